@@ -0,0 +1,91 @@
+"""Per-element size reading versus the single extraction script.
+
+Loads every store's fixture page in Chrome and reads name, price and the
+availability of every size twice: the old way, one WebDriver call per
+element and attribute, and with ``extract_product``'s one script call. Both
+results are checked against the sizes the fixture page has in stock before
+the timings are reported. Needs Chrome, but no network:
+
+    python -m benchmarks.extraction --runs 20
+"""
+import argparse
+import statistics
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from browser import BrowserPool
+from extraction import extract_product, extraction_selectors
+from fixture_server import FixtureServer
+from settings import STORES
+
+# What the fixture pages in fixtures/ have in stock
+EXPECTED_IN_STOCK = {
+    'zara': {'S', 'M'},
+    'pullandbear': {'34', '38'},
+    'bershka': {'M', 'L'}
+}
+
+def per_element(driver, selectors: dict) -> dict:
+    """The old path: a round trip for every lookup, text and attribute."""
+    name = driver.find_element(By.CSS_SELECTOR, selectors['name']).text.strip()
+    price = driver.find_element(By.CSS_SELECTOR, selectors['price']).text.strip()
+    sizes = {}
+    for element in driver.find_elements(By.CSS_SELECTOR, selectors['sizes']):
+        size = element.text.strip().upper()
+        sizes[size] = (
+            element.get_attribute("data-qa-action") == "size-in-stock"
+            and not element.get_attribute("disabled")
+        )
+    return {'name': name, 'price': price, 'sizes': sizes}
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def check(store: str, method: str, result: dict):
+    in_stock = {size for size, available in result['sizes'].items() if available}
+    if not result['name'] or in_stock != EXPECTED_IN_STOCK[store]:
+        raise AssertionError(f"{method} read {store} wrong: {result}")
+
+def run(runs: int):
+    results = {}
+    with FixtureServer() as server:
+        driver = BrowserPool.create_driver()
+        try:
+            for store in STORES:
+                selectors = extraction_selectors(store)
+                driver.get(server.url(store))
+                WebDriverWait(driver, 30).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, selectors['sizes']))
+                )
+                for method, func in (('per-element', per_element), ('script', extract_product)):
+                    samples = []
+                    for _ in range(runs):
+                        elapsed, result = timed(func, driver, selectors)
+                        check(store, method, result)
+                        samples.append(elapsed)
+                    results[(method, store)] = (statistics.median(samples), max(samples))
+        finally:
+            driver.quit()
+    return results
+
+def report(results):
+    print(f"{'store':<12} {'method':<12} {'median (ms)':>12} {'max (ms)':>9}")
+    for store in STORES:
+        for method in ('per-element', 'script'):
+            median, worst = results[(method, store)]
+            print(f"{store:<12} {method:<12} {median * 1000:>12.1f} {worst * 1000:>9.1f}")
+        before = results[('per-element', store)][0]
+        after = results[('script', store)][0]
+        print(f"{'':<12} {'speedup':<12} {before / after:>11.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="reads per store and method")
+    args = parser.parse_args()
+    report(run(args.runs))
+
+if __name__ == "__main__":
+    main()
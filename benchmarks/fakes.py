@@ -0,0 +1,35 @@
+"""Stand-ins for the Discord side of the bot, so benchmarks run offline."""
+import asyncio
+import time
+
+class FakeChannel:
+    """Records what would have been sent to a Discord channel."""
+
+    def __init__(self, channel_id: int, latency: float = 0.0):
+        self.id = channel_id
+        self.latency = latency
+        self.messages = []  # (time sent, number of embeds, number of files)
+
+    async def send(self, content=None, *, embed=None, embeds=None, file=None, files=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        embeds = embeds or ([embed] if embed else [])
+        files = files or ([file] if file else [])
+        self.messages.append((time.monotonic(), len(embeds), len(files)))
+
+class FakeBot:
+    """Just enough of ``commands.Bot`` for the monitor cog and the notifier."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.channels = {}
+
+    def get_channel(self, channel_id: int) -> FakeChannel:
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = FakeChannel(channel_id, self.latency)
+        return channel
+
+    @property
+    def messages_sent(self) -> int:
+        return sum(len(channel.messages) for channel in self.channels.values())
@@ -0,0 +1,102 @@
+"""Size and query time of the availability history after months of checks.
+
+Replays ``--days`` of checks every ``--interval`` seconds for one product
+(random restocks and occasional price changes) through ``HistoryStore`` with
+a simulated clock, flushing every minute and compacting every hour as the
+bot does. The resulting history is then copied to ``--products`` products
+in one database to report the file size and the time ``!history`` needs to
+build a timeline. Runs offline:
+
+    python -m benchmarks.history --days 90 --products 3000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from history import HistoryStore
+from settings import HISTORY_COMPACT_INTERVAL, HISTORY_FLUSH_INTERVAL
+
+SIZES = ['XS', 'S', 'M', 'L', 'XL']
+
+def replay(history: HistoryStore, key: str, days: int, interval: int) -> float:
+    """Record ``days`` of checks; returns the seconds spent recording."""
+    rng = random.Random(1)
+    start = time.time() - days * 86400
+    in_stock = set()
+    price = 59.95
+    spent = 0.0
+    last_flush = last_compact = start
+    for step in range(days * 86400 // interval):
+        now = start + step * interval
+        for size in SIZES:
+            # Sold out most of the time, with restocks lasting a few checks
+            if size in in_stock and rng.random() < 0.3:
+                in_stock.discard(size)
+            elif rng.random() < 0.01:
+                in_stock.add(size)
+        if rng.random() < 0.001:
+            price = round(price * rng.choice([0.7, 0.8, 1.0, 1.25]), 2)
+        started = time.perf_counter()
+        history.record(key, in_stock, price, when=now)
+        if now - last_flush >= HISTORY_FLUSH_INTERVAL:
+            history.flush()
+            last_flush = now
+        if now - last_compact >= HISTORY_COMPACT_INTERVAL:
+            history.compact(key, now=now)
+            last_compact = now
+        spent += time.perf_counter() - started
+    history.flush()
+    history.compact(key)
+    return spent
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=90, help="days of history")
+    parser.add_argument("--interval", type=int, default=300, help="seconds between checks")
+    parser.add_argument("--products", type=int, default=3000, help="products sharing the database")
+    parser.add_argument("--queries", type=int, default=200, help="timelines to build")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.db")
+        history = HistoryStore(path)
+        checks = args.days * 86400 // args.interval
+        spent = replay(history, "product-0", args.days, args.interval)
+        samples = history.read("product-0")
+        print(f"{checks} checks over {args.days} days -> {len(samples)} samples, "
+              f"{len(samples.to_bytes()) / 1024:.1f} KB per product")
+        print(f"recording: {spent / checks * 1e6:.1f} us per check (flush and compaction included)")
+
+        # Same history for every other product
+        data = samples.to_bytes()
+        sizes = ' '.join(history.sizes["product-0"])
+        with history.conn:
+            history.conn.execute("BEGIN")
+            history.conn.executemany(
+                "INSERT INTO history_chunks (key, seq, samples) VALUES (?, 1, ?)",
+                ((f"product-{i}", data) for i in range(1, args.products))
+            )
+            history.conn.executemany(
+                "INSERT INTO history_sizes (key, sizes) VALUES (?, ?)",
+                ((f"product-{i}", sizes) for i in range(1, args.products))
+            )
+        history.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        history.close()
+
+        history = HistoryStore(path)
+        timings = []
+        for _ in range(args.queries):
+            key = f"product-{random.randrange(args.products)}"
+            started = time.perf_counter()
+            timeline = history.timeline(key, SIZES)
+            timings.append(time.perf_counter() - started)
+        restocks = sum(len(periods) for periods in timeline.restocks.values())
+        print(f"{args.products} products: database {os.path.getsize(path) / 2**20:.1f} MB")
+        print(f"!history timeline: median {statistics.median(timings) * 1000:.2f} ms, "
+              f"max {max(timings) * 1000:.2f} ms ({restocks} restocks, {len(timeline.prices)} price changes)")
+        history.close()
+
+if __name__ == "__main__":
+    main()
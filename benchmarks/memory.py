@@ -0,0 +1,128 @@
+"""Memory held by watched products, old record layout versus ``Product``.
+
+Builds N products the way a running bot holds them (registered in a
+``ProductRegistry``, subscribed by one of several channels and checked once)
+with the previous plain dataclass and with the current slotted ``Product``,
+and reports the bytes allocated per product and the time to fan out one
+check result to every product. Runs offline in a few seconds:
+
+    python -m benchmarks.memory --products 10000 100000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+from models import Product
+from registry import ProductRegistry, normalize_url
+from settings import STORES
+
+WATCHED_SIZES = {
+    'zara': ['S', 'M', 'L'],
+    'pullandbear': ['34', '38', '40'],
+    'bershka': ['M', 'XL']
+}
+IN_STOCK = ['M', '38']
+CHANNELS = 10
+
+@dataclass
+class LegacyProduct:
+    """The record as it was before it was slotted and interned."""
+    url: str
+    sizes: List[str]
+    store: str
+    name: Optional[str] = None
+    price: Optional[str] = None
+    last_check: Optional[datetime] = None
+    channel_id: Optional[int] = None
+    subscriptions: Dict[int, List[str]] = field(default_factory=dict)
+    availability: Dict[str, bool] = field(default_factory=dict)
+    last_screenshot: Optional[str] = None
+
+class LegacyRegistry(ProductRegistry):
+    """``ProductRegistry`` keeping sizes as plain upper-cased lists."""
+
+    def subscribe(self, product, channel_id, sizes):
+        key = normalize_url(product.url)
+        existing = self.products.setdefault(key, product)
+        merged = dict.fromkeys(existing.subscriptions.get(channel_id, []))
+        merged.update(dict.fromkeys(size.upper() for size in sizes))
+        existing.subscriptions[channel_id] = list(merged)
+        existing.sizes = list(dict.fromkeys(s for subscribed in existing.subscriptions.values() for s in subscribed))
+        urls = self.channels.setdefault(channel_id, [])
+        if key not in urls:
+            urls.append(key)
+        return existing
+
+def build_legacy(count: int) -> LegacyRegistry:
+    registry = LegacyRegistry()
+    stores = list(STORES)
+    for i in range(count):
+        store = stores[i % len(stores)]
+        # Sizes and prices arrive as fresh strings from commands and pages
+        sizes = [size.lower().upper() for size in WATCHED_SIZES[store]]
+        product = LegacyProduct(
+            url=f"https://www.{store}.com/es/en/product-p{i:08d}.html",
+            sizes=list(sizes),
+            store=store.lower(),
+            name=f"Product {i}",
+            price=f"{29.95 + i % 50:.2f} EUR",
+            last_check=datetime.now()
+        )
+        product = registry.subscribe(product, i % CHANNELS, sizes)
+        product.availability = {size: size in IN_STOCK for size in product.sizes}
+    return registry
+
+def build_current(count: int) -> ProductRegistry:
+    registry = ProductRegistry()
+    stores = list(STORES)
+    for i in range(count):
+        store = stores[i % len(stores)]
+        sizes = [size.lower().upper() for size in WATCHED_SIZES[store]]
+        product = Product(
+            url=f"https://www.{store}.com/es/en/product-p{i:08d}.html",
+            sizes=sizes,
+            store=store.lower(),
+            name=f"Product {i}",
+            price=f"{29.95 + i % 50:.2f} EUR",
+            checked_at=time.monotonic()
+        )
+        product = registry.subscribe(product, i % CHANNELS, sizes)
+        product.update_availability(IN_STOCK)
+    return registry
+
+def measure(build, count: int):
+    """Bytes allocated by ``build(count)`` and the object it built."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(count)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, result
+
+def fan_out(registry: ProductRegistry) -> float:
+    started = time.perf_counter()
+    for product in registry:
+        registry.fan_out(product, IN_STOCK)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, nargs="+", default=[10000, 100000],
+                        help="numbers of products to build")
+    args = parser.parse_args()
+
+    print(f"{'products':>9} {'layout':<8} {'MB':>8} {'bytes/product':>14} {'fan-out ms':>11}")
+    for count in args.products:
+        for layout, build in (('old', build_legacy), ('current', build_current)):
+            used, products = measure(build, count)
+            elapsed = fan_out(products)
+            print(f"{count:>9} {layout:<8} {used / 2**20:>8.1f} {used / count:>14.0f} {elapsed * 1000:>11.1f}")
+            del products
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Before/after report for the resource-blocking browser profile.
+
+Loads every store's fixture page with a plain Chrome profile (``normal`` page
+loads, nothing blocked) and with the profile the monitor uses (``eager`` page
+loads plus the store's network policy), and reports bytes transferred and the
+time until the size buttons are on the page. Needs Chrome, but no network:
+
+    python -m benchmarks.network_policy --runs 5
+"""
+import argparse
+import statistics
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from browser import BrowserPool, apply_network_policy
+from fixture_server import FixtureServer
+from settings import STORES
+
+SIZE_BUTTON = (By.XPATH, '//button[@data-qa-action="size-in-stock"]')
+
+# Sum of bytes the page pulled over the network, including the document itself
+TRANSFERRED_JS = """
+return performance.getEntriesByType('navigation')
+    .concat(performance.getEntriesByType('resource'))
+    .reduce((total, entry) => total + (entry.transferSize || entry.encodedBodySize || 0), 0);
+"""
+
+def measure(driver, url: str, store: str, optimized: bool, settle: float):
+    """Load ``url`` once and return (seconds to size buttons, bytes transferred)."""
+    if optimized:
+        apply_network_policy(driver, store)
+    driver.execute_script("performance.clearResourceTimings()")
+    start = time.perf_counter()
+    driver.get(url)
+    WebDriverWait(driver, 30).until(EC.presence_of_element_located(SIZE_BUTTON))
+    elapsed = time.perf_counter() - start
+    # Let late images, fonts and scripts finish so their bytes are counted
+    time.sleep(settle)
+    return elapsed, driver.execute_script(TRANSFERRED_JS)
+
+def run(runs: int, settle: float):
+    results = {}
+    with FixtureServer() as server:
+        profiles = {
+            'baseline': BrowserPool.create_driver(page_load_strategy='normal', block_resources=False),
+            'optimized': BrowserPool.create_driver()
+        }
+        try:
+            for name, driver in profiles.items():
+                # Every run should hit the network, not the HTTP cache
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+                for store in STORES:
+                    samples = [
+                        measure(driver, server.url(store, f"run-{i}"), store, name == 'optimized', settle)
+                        for i in range(runs)
+                    ]
+                    results[(name, store)] = (
+                        statistics.median(s[0] for s in samples),
+                        statistics.median(s[1] for s in samples)
+                    )
+        finally:
+            for driver in profiles.values():
+                driver.quit()
+    return results
+
+def report(results):
+    print(f"{'store':<12} {'profile':<10} {'to sizes (ms)':>14} {'transferred (KB)':>17}")
+    for store in STORES:
+        for name in ('baseline', 'optimized'):
+            elapsed, transferred = results[(name, store)]
+            print(f"{store:<12} {name:<10} {elapsed * 1000:>14.0f} {transferred / 1024:>17.0f}")
+        before = results[('baseline', store)]
+        after = results[('optimized', store)]
+        print(f"{'':<12} {'saved':<10} {(1 - after[0] / before[0]) * 100:>13.0f}% "
+              f"{(1 - after[1] / max(before[1], 1)) * 100:>16.0f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="page loads per store and profile")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to let late requests finish")
+    args = parser.parse_args()
+    report(run(args.runs, args.settle))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Time from starting ``main.py`` until the bot is ready to log in to Discord.
+
+Each run starts a fresh interpreter that imports ``main`` (as
+``python main.py`` does), builds the ``StockBot`` and runs its setup hook
+(loading saved products, adding the cogs), then stops just before the
+Discord login. Runs happen in a scratch directory whose database holds
+``--products`` saved products, so a Chrome pre-start in the background is
+included when there are products. The median must stay under ``--target``
+seconds, otherwise the script exits with status 1:
+
+    python -m benchmarks.startup --runs 5 --products 0 100 --target 1.0
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from models import Product
+from registry import ProductRegistry
+from storage import ProductStore
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints once the bot could call login()
+CHILD = """
+import asyncio
+import main
+from bot import StockBot
+
+async def start():
+    bot = StockBot(workers=0)
+    await bot._async_setup_hook()
+    await bot.setup_hook()
+    print("ready", flush=True)
+    await bot.close()
+
+asyncio.run(start())
+"""
+
+def seed(path: str, count: int):
+    """Save ``count`` products to a fresh database at ``path``."""
+    store = ProductStore(path)
+    registry = ProductRegistry()
+    for i in range(count):
+        product = Product(url=f"https://www.zara.com/es/en/product-p{i:08d}.html", sizes=[], store='zara',
+                          name=f"Product {i}", price="59.95 EUR")
+        store.save_subscription(registry.subscribe(product, 1, ['S', 'M']), 1)
+    store.close()
+
+def time_startup(directory: str) -> float:
+    env = dict(os.environ, PYTHONPATH=REPO, DISCORD_TOKEN="benchmark")
+    started = time.perf_counter()
+    child = subprocess.Popen([sys.executable, "-c", CHILD], cwd=directory, env=env,
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = child.stdout.readline()
+    elapsed = time.perf_counter() - started
+    child.wait()
+    if line.strip() != "ready":
+        raise RuntimeError(f"bot did not start (exit code {child.returncode})")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="starts per product count")
+    parser.add_argument("--products", type=int, nargs="+", default=[0, 100], help="saved products")
+    parser.add_argument("--target", type=float, default=1.0, help="median start time to stay under, seconds")
+    args = parser.parse_args()
+
+    print(f"{'products':>9} {'median s':>9} {'max s':>7}")
+    slow = False
+    for count in args.products:
+        with tempfile.TemporaryDirectory() as directory:
+            seed(os.path.join(directory, "stock_monitor.db"), count)
+            samples = [time_startup(directory) for _ in range(args.runs)]
+        median = statistics.median(samples)
+        slow = slow or median > args.target
+        print(f"{count:>9} {median:>9.2f} {max(samples):>7.2f}")
+    print(f"target: under {args.target:.2f} s -> {'FAILED' if slow else 'ok'}")
+    sys.exit(1 if slow else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Offline throughput benchmark for the stock check pipeline.
+
+Serves the fixture pages locally with a configurable response time, watches N
+products spread over the three stores, and checks every product once through
+``StockMonitorCog.check_product`` with alerts going to fake Discord channels.
+For each N it reports checks/min, p50/p95 check latency, RSS and CPU time.
+No network access is needed:
+
+    python -m benchmarks.throughput --products 10 100 1000 --latency 0.2
+    python -m benchmarks.throughput --browser   # Chrome for every check
+    python -m benchmarks.throughput --workers 4 # checks in 4 worker processes
+"""
+import argparse
+import asyncio
+import resource
+import time
+from benchmarks.fakes import FakeBot
+from browser import BrowserHandler
+from fixture_server import FixtureServer
+from models import Product
+from monitor import StockMonitorCog
+from registry import normalize_url
+from settings import BROWSER_POOL_SIZE, STORES
+from storage import ProductStore
+from workers import WorkerClient
+
+# Sizes to watch per store; some are in stock on the fixture pages, some not
+WATCHED_SIZES = {
+    'zara': ['S', 'M', 'L'],
+    'pullandbear': ['34', '38', '40'],
+    'bershka': ['M', 'XL']
+}
+CHANNELS = 10
+
+def current_rss() -> int:
+    """Resident memory of this process in bytes (0 where /proc is missing)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run_once(server: FixtureServer, count: int, args) -> dict:
+    """Check ``count`` products once each and return the measurements."""
+    bot = FakeBot(latency=args.discord_latency)
+    options = dict(http_fast_path=not args.browser, screenshots=args.browser, prewarm=args.browser)
+    if args.workers:
+        browser = WorkerClient(args.workers, pool_size=args.pool_size, **options)
+    else:
+        browser = BrowserHandler(pool_size=args.pool_size, **options)
+    cog = StockMonitorCog(bot, browser, ProductStore(":memory:"))
+    stores = list(STORES)
+    for i in range(count):
+        store = stores[i % len(stores)]
+        product = Product(url=server.url(store, f"p{i}"), sizes=[], store=store, name=f"Product {i}")
+        cog.products.subscribe(product, i % CHANNELS, WATCHED_SIZES[store])
+
+    latencies = []
+    limit = asyncio.Semaphore(browser.concurrency)
+
+    async def check(product):
+        async with limit:
+            started = time.perf_counter()
+            await cog.check_product(product)
+            latencies.append(time.perf_counter() - started)
+
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    await asyncio.gather(*(check(product) for product in cog.products))
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_before
+
+    # Let the notifier flush its batches into the fake channels
+    await asyncio.sleep(cog.notifier.window + 0.5)
+    browser_rss = sum(rss or 0 for rss in browser.pool.memory().values())
+    result = {
+        'products': count,
+        'checks_per_min': count / elapsed * 60,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'rss': current_rss(),
+        'browser_rss': browser_rss,
+        'cpu': cpu,
+        'messages': bot.messages_sent
+    }
+    for product in cog.products:
+        cog.scheduler.remove(normalize_url(product.url))
+    await cog.cog_unload()
+    return result
+
+def report(results, args):
+    mode = "browser" if args.browser else "http fast path"
+    workers = f"{args.workers} worker processes" if args.workers else "in-process"
+    print(f"mode: {mode}, {workers}, pool size {args.pool_size}, store latency {args.latency * 1000:.0f} ms")
+    print(f"{'products':>9} {'checks/min':>11} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'RSS MB':>7} {'Chrome MB':>10} {'CPU s':>7} {'messages':>9}")
+    for r in results:
+        print(f"{r['products']:>9} {r['checks_per_min']:>11.0f} {r['p50'] * 1000:>8.0f} "
+              f"{r['p95'] * 1000:>8.0f} {r['rss'] / 2**20:>7.0f} {r['browser_rss'] / 2**20:>10.0f} "
+              f"{r['cpu']:>7.2f} {r['messages']:>9}")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS of the benchmark process: {peak:.0f} MB")
+
+async def main_async(args):
+    results = []
+    with FixtureServer(latency=args.latency) as server:
+        for count in args.products:
+            results.append(await run_once(server, count, args))
+    report(results, args)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--latency", type=float, default=0.2, help="mean store response time in seconds")
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="seconds per fake Discord send")
+    parser.add_argument("--pool-size", type=int, default=BROWSER_POOL_SIZE)
+    parser.add_argument("--browser", action="store_true", help="check every product in Chrome")
+    parser.add_argument("--workers", type=int, default=0, help="check worker processes (0: in-process)")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,23 @@
 import discord
 from discord.ext import commands
+import asyncio
 import logging
+import time
 from models import Product
 from browser import BrowserHandler
+from cluster import ClusterNode, SQLiteLeases
+from importer import parse_watch_list
+from metrics import MetricsServer
 from monitor import StockMonitorCog
-from settings import STORES
+from storage import ProductStore
+from workers import WorkerClient
+from settings import CHECK_WORKERS, CLUSTER_NODE_ID, DB_PATH, MAX_IMPORT_BYTES, METRICS_PORT, STORES
 
-# Configure logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
 class StockBot(commands.Bot):
-    def __init__(self):
+    def __init__(self, workers: int = CHECK_WORKERS, node: str = CLUSTER_NODE_ID,
+                 metrics_port: int = METRICS_PORT):
         # Set up all required intents
         intents = discord.Intents.default()
         intents.message_content = True
@@ -26,20 +29,59 @@ class StockBot(commands.Bot):
         # Remove default help command to use our custom one
         self.remove_command('help')
         
-        # Initialize browser
-        self.browser = BrowserHandler()
+        # Initialize browser (in this process or in check workers) and saved products
+        self.browser = WorkerClient(workers) if workers else BrowserHandler()
+        self.store = ProductStore()
+        # With a node name, share the saved products with the other instances
+        self.cluster = ClusterNode(node, SQLiteLeases(DB_PATH)) if node else None
+        self.metrics = MetricsServer(port=metrics_port) if metrics_port else None
+        self.config_import = None
+        self.prewarm = None
         
     async def setup_hook(self):
         # Add stock monitoring cog and commands
+        monitor = StockMonitorCog(self, self.browser, self.store, self.cluster)
         await self.add_cog(Commands(self))
-        await self.add_cog(StockMonitorCog(self, self.browser))
+        await self.add_cog(monitor)
+        if self.metrics:
+            try:
+                await self.metrics.start()
+            except OSError as e:
+                # e.g. another node on this host already serves that port
+                logger.warning("Could not serve metrics on port %s, running without them: %s", self.metrics.port, e)
+                await self.metrics.stop()
+                self.metrics = None
+        # Pick up the watch list in config.json without delaying startup
+        self.config_import = asyncio.create_task(monitor.import_config())
+        # Saved products will need Chrome soon; start it while we log in
+        if len(monitor.products):
+            self.prewarm = asyncio.create_task(self.browser.prewarm())
+        
+    async def on_message(self, message):
+        # Every instance sees every message; each channel's commands are
+        # answered by one node only
+        monitor = self.get_cog('StockMonitorCog')
+        if monitor and not monitor.handles_channel(message.channel.id):
+            return
+        await self.process_commands(message)
         
     async def on_ready(self):
-        logger.info(f'Bot is ready! Logged in as {self.user.name}')
+        logger.info("Bot is ready! Logged in as %s", self.user.name)
         
     async def close(self):
         """Clean up resources when bot shuts down."""
-        self.browser.close()
+        if self.config_import:
+            self.config_import.cancel()
+        if self.prewarm:
+            self.prewarm.cancel()
+        if self.metrics:
+            await self.metrics.stop()
+        await self.browser.aclose()
+        if self.cluster:
+            # Hand this node's products to the others right away
+            await asyncio.to_thread(self.cluster.leave)
+            self.cluster.leases.close()
+        self.store.close()
         await super().close()
 
 class Commands(commands.Cog):
@@ -73,6 +115,67 @@ class Commands(commands.Cog):
         else:
             await ctx.send("Error: Monitor system not initialized!")
     
+    @commands.command(name='monitor-bulk')
+    async def add_products(self, ctx):
+        """Add every product in an attached JSON or CSV watch list."""
+        if not ctx.message.attachments:
+            await ctx.send(
+                "Attach a JSON or CSV file to the command. JSON: a list of "
+                "{\"url\": ..., \"sizes\": [...]} objects; CSV: url,sizes,store columns."
+            )
+            return
+            
+        attachment = ctx.message.attachments[0]
+        if attachment.size > MAX_IMPORT_BYTES:
+            await ctx.send(f"That file is too large (limit {MAX_IMPORT_BYTES // 1024} KB).")
+            return
+            
+        try:
+            entries, problems = parse_watch_list(await attachment.read(), attachment.filename)
+        except ValueError as e:
+            await ctx.send(f"Could not read {attachment.filename}: {str(e)}")
+            return
+            
+        if not entries:
+            await ctx.send("No valid products found in the file.\n" + "\n".join(problems[:10]))
+            return
+            
+        monitor_cog = self.bot.get_cog('StockMonitorCog')
+        if not monitor_cog:
+            await ctx.send("Error: Monitor system not initialized!")
+            return
+            
+        message = await ctx.send(f"Importing {len(entries)} products...")
+        last_update = time.monotonic()
+        
+        async def progress(done, total):
+            nonlocal last_update
+            # Discord rate limits message edits; a few per minute is plenty
+            if done < total and time.monotonic() - last_update < 5:
+                return
+            last_update = time.monotonic()
+            try:
+                await message.edit(content=f"Importing products: {done}/{total}")
+            except discord.HTTPException:
+                pass
+                
+        results = await monitor_cog.import_products(ctx.channel.id, entries, progress)
+        
+        embed = discord.Embed(
+            title="📥 Import Finished",
+            description=f"Now monitoring {results['added'] + results['existing']} of {len(entries)} products",
+            color=0x2ecc71 if not results['failed'] else 0xe67e22
+        )
+        embed.add_field(name="New", value=str(results['added']))
+        embed.add_field(name="Already Watched", value=str(results['existing']))
+        skipped = problems + results['failed']
+        if skipped:
+            shown = "\n".join(skipped[:10])
+            if len(skipped) > 10:
+                shown += f"\n...and {len(skipped) - 10} more"
+            embed.add_field(name=f"Skipped ({len(skipped)})", value=shown[:1024], inline=False)
+        await ctx.send(embed=embed)
+    
     @commands.command(name='list')
     async def list_products(self, ctx):
         """List all monitored products in this channel."""
@@ -91,6 +194,15 @@ class Commands(commands.Cog):
         else:
             await ctx.send("Error: Monitor system not initialized!")
     
+    @commands.command(name='history')
+    async def show_history(self, ctx, index: int = None):
+        """Show restocks and price changes of a product. Use !list to see numbers."""
+        monitor_cog = self.bot.get_cog('StockMonitorCog')
+        if monitor_cog:
+            await monitor_cog.show_history(ctx, index)
+        else:
+            await ctx.send("Error: Monitor system not initialized!")
+    
     @commands.command(name='info')
     async def info_command(self, ctx):
         """Show help information."""
@@ -102,8 +214,10 @@ class Commands(commands.Cog):
         
         commands = {
             "!monitor <store> <url> <sizes...>": "Start monitoring a product\nExample: !monitor zara https://zara.com/... S M L",
+            "!monitor-bulk": "Monitor every product in an attached JSON or CSV file (url, sizes, store)",
             "!list": "Show all monitored products",
             "!remove [number]": "Stop monitoring a product (use !list to see numbers)",
+            "!history [number]": "Show when a product's sizes were in stock and its price changes",
             "!info": "Show this help message"
         }
         
@@ -119,7 +233,8 @@ class Commands(commands.Cog):
             
         await ctx.send(embed=help_embed)
         
-def run_bot(token: str):
-    """Run the bot with the given token."""
-    bot = StockBot()
-    bot.run(token)
\ No newline at end of file
+def run_bot(token: str, workers: int = CHECK_WORKERS, node: str = CLUSTER_NODE_ID,
+            metrics_port: int = METRICS_PORT):
+    """Run the bot with the given token, check worker processes, cluster node name and metrics port."""
+    bot = StockBot(workers, node, metrics_port)
+    bot.run(token, log_handler=None)  # logging is set up by setup_logging
\ No newline at end of file
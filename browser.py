@@ -1,29 +1,239 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-import os
+# selenium.webdriver takes a few hundred milliseconds to import, so it is
+# only loaded by the code that talks to Chrome; checks answered over HTTP
+# never need it.
+from selenium.common.exceptions import (
+    ElementClickInterceptedException, ElementNotInteractableException, NoSuchElementException,
+    SessionNotCreatedException, StaleElementReferenceException, TimeoutException, WebDriverException
+)
 import logging
+import os
+import itertools
+import signal
 import time
-import random
-from datetime import datetime
+import weakref
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from chromedriver import chromedriver_path, forget_chromedriver, pinned_chromedriver
+from extraction import extract_product, extraction_selectors
+from failures import FAILED, NOT_FOUND, SELECTOR_MISSING, TIMEOUT, CheckFailed
+from fetchers import HttpStockChecker
+from metrics import STAGE_SECONDS
+from ratelimit import Throttled
+from screenshots import encode_screenshot
+from settings import (
+    ALERT_SCREENSHOTS, BROWSER_POOL_SIZE, CHECK_DEADLINE, DRIVER_MAX_NAVIGATIONS, DRIVER_MAX_RSS_MB, GONE_STATUSES,
+    HTTP_FAST_PATH, NETWORK_POLICIES, PAGE_LOAD_STRATEGY, PAGE_LOAD_TIMEOUT, READY_TIMEOUT, RESOURCE_TYPE_PATTERNS,
+    SCREENSHOT_SELECTORS, THROTTLE_STATUSES
+)
 
 logger = logging.getLogger(__name__)
 
-class BrowserHandler:
-    def __init__(self):
-        self.driver = None
-        self.setup_driver()
-        
-    def setup_driver(self):
-        """Initialize Chrome WebDriver with appropriate options."""
-        if self.driver:
-            return
-            
+def network_policy(store: str) -> dict:
+    """The store's network policy, falling back to the default one."""
+    return NETWORK_POLICIES.get(store, NETWORK_POLICIES['default'])
+
+def blocked_url_patterns(policy: dict) -> list:
+    """Expand a policy's resource types and URL patterns into CDP patterns."""
+    patterns = list(policy.get('blocked_urls', []))
+    for resource_type in policy.get('resource_types', []):
+        patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+    return patterns
+
+def apply_network_policy(driver, store: str):
+    """Block the store's unneeded requests on this driver via DevTools.
+
+    Drivers are shared between stores, so the policy is re-applied only when
+    the driver moves to a different store than its previous page.
+    """
+    if _driver_policies.get(driver) == store:
+        return
+    patterns = blocked_url_patterns(network_policy(store))
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    _driver_policies[driver] = store
+
+_driver_policies = weakref.WeakKeyDictionary()  # driver -> store whose policy is active
+
+# WebDriver errors caused by the page rather than a dead browser session
+PAGE_ERRORS = (
+    TimeoutException, NoSuchElementException, StaleElementReferenceException,
+    ElementNotInteractableException, ElementClickInterceptedException
+)
+
+# HTTP status of the current page (0 where Chrome does not report it)
+NAVIGATION_STATUS_JS = """
+var entry = performance.getEntriesByType('navigation')[0];
+return entry && entry.responseStatus || 0;
+"""
+
+def load_page(driver, store: str, url: str):
+    """Navigate to ``url`` under the store's network policy (blocking).
+
+    A load that runs past ``PAGE_LOAD_TIMEOUT`` is stopped rather than
+    failed: the elements a check needs are usually there long before the
+    last slow script finishes, and the caller waits for those anyway.
+    Raises ``Throttled`` when the store answered with a block page and
+    ``CheckFailed`` when the product page is gone.
+    """
+    apply_network_policy(driver, store)
+    try:
+        driver.get(url)
+    except TimeoutException:
+        logger.warning("Page load timed out, reading what has loaded: %s", url)
+        driver.execute_script("window.stop();")
+    status = driver.execute_script(NAVIGATION_STATUS_JS)
+    if status in THROTTLE_STATUSES:
+        raise Throttled(status)
+    if status in GONE_STATUSES:
+        raise CheckFailed(NOT_FOUND, f"HTTP {status}")
+
+def check_failure(error: Exception) -> CheckFailed:
+    """Classify why a browser check failed."""
+    if isinstance(error, CheckFailed):
+        return error
+    if isinstance(error, (asyncio.TimeoutError, TimeoutException)):
+        return CheckFailed(TIMEOUT, str(error).strip() or "no answer in time")
+    return CheckFailed(FAILED, f"{type(error).__name__}: {error}")
+
+def _process_tree(pid: int) -> List[int]:
+    """A process and all its descendants, read from ``/proc`` (Linux only)."""
+    pids = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            pass
+    return pids
+
+def _process_tree_rss(pid: int) -> Optional[int]:
+    """Resident memory in bytes of a process and all its descendants.
+
+    Reads ``/proc`` (Linux only); returns ``None`` where that is unavailable.
+    """
+    total = 0
+    for current in _process_tree(pid):
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except (OSError, ValueError):
+            pass
+    return total or None
+
+def kill_driver(driver):
+    """Kill chromedriver and every Chrome process under it.
+
+    Unlike ``driver.quit()`` this does not go through chromedriver, so it
+    also works while another thread is stuck in a WebDriver call; that call
+    then fails with a connection error instead of hanging.
+    """
+    roots = []
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    if process:
+        roots.append(process.pid)
+    if getattr(driver, 'browser_pid', None):  # undetected_chromedriver
+        roots.append(driver.browser_pid)
+    for root in roots:
+        # Children first, so none of them is re-parented before we see it
+        for pid in reversed(_process_tree(root)):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+class PooledDriver:
+    """A pooled Chrome driver plus the bookkeeping used to recycle it."""
+
+    def __init__(self, driver, number: int):
+        self.driver = driver
+        self.number = number  # stable id for logs and stats
+        self.started = time.monotonic()
+        self.navigations = 0
+        self.broken = False  # set when the session is known to be dead
+
+    @property
+    def pid(self) -> Optional[int]:
+        process = getattr(getattr(self.driver, 'service', None), 'process', None)
+        return process.pid if process else None
+
+    def rss(self) -> Optional[int]:
+        """Memory used by chromedriver and its Chrome processes, in bytes."""
+        return _process_tree_rss(self.pid) if self.pid else None
+
+    def probe(self) -> bool:
+        """Liveness check: a trivial script round trip (blocking)."""
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except:
+            pass
+
+    def kill(self):
+        """Kill the browser from another thread; see ``kill_driver``."""
+        self.broken = True
+        kill_driver(self.driver)
+
+class BrowserPool:
+    """Fixed-size pool of Chrome drivers handed out one check at a time.
+
+    Drivers are started on demand, up to ``size``, and returned to the pool
+    once the caller is done with them. A caller that finds every driver
+    checked out waits until one is returned, so at most ``size`` pages are
+    being loaded at any moment. Starting Chrome happens on ``executor`` so
+    the event loop is never blocked by a browser launch.
+
+    Each driver is probed before it is handed out and replaced when the
+    probe fails or a caller marks it ``broken``. Drivers are also retired
+    after ``DRIVER_MAX_NAVIGATIONS`` page loads or once their Chrome process
+    tree grows past ``DRIVER_MAX_RSS_MB``, which keeps long-running
+    deployments from creeping up in memory.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, executor=None,
+                 max_navigations: int = DRIVER_MAX_NAVIGATIONS, max_rss_mb: int = DRIVER_MAX_RSS_MB):
+        if size < 1:
+            raise ValueError("Browser pool size must be at least 1")
+        self.size = size
+        self.executor = executor
+        self.max_navigations = max_navigations
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.drivers = []  # every PooledDriver owned by the pool
+        self.stats = {
+            'started': 0,   # drivers launched
+            'restarts': 0,  # drivers replaced after dying
+            'recycled': 0   # drivers retired by navigation count or memory
+        }
+        self._numbers = itertools.count(1)
+        self._starting = 0
+        self._idle = asyncio.Queue()
+        self._limit = asyncio.Semaphore(size)
+
+    @staticmethod
+    def create_driver(page_load_strategy: str = PAGE_LOAD_STRATEGY, block_resources: bool = True):
+        """Initialize Chrome WebDriver with appropriate options.
+
+        With ``block_resources`` the driver is ready for per-store network
+        policies (see ``apply_network_policy``) and never renders images.
+        """
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
         chrome_options = webdriver.ChromeOptions()
+        chrome_options.page_load_strategy = page_load_strategy
         chrome_options.add_argument("--headless=new")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
@@ -35,97 +245,370 @@ class BrowserHandler:
             "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
         )
         
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        if block_resources:
+            chrome_options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2
+            })
         
-    async def get_product_info(self, store: str, url: str) -> dict:
-        """Get product information from the URL."""
         try:
-            if not self.driver:
-                self.setup_driver()
-            
-            # Wait and navigate
-            time.sleep(random.uniform(1, 2))
-            self.driver.get(url)
-            time.sleep(random.uniform(2, 3))
-            
-            # Get product name
-            wait = WebDriverWait(self.driver, 10)
-            product_name = None
-            
+            driver = webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
+        except SessionNotCreatedException:
+            if pinned_chromedriver():
+                raise
+            # The remembered driver no longer matches the installed Chrome
+            logger.warning("Chrome rejected the cached chromedriver, resolving it again")
+            forget_chromedriver()
+            driver = webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        if block_resources:
+            driver.execute_cdp_cmd("Network.enable", {})
+        return driver
+
+    def warm(self):
+        """Start one driver ahead of the first checkout."""
+        if not self.drivers:
+            pooled = self._track(self.create_driver())
+            self._idle.put_nowait(pooled)
+
+    async def prewarm(self):
+        """Like ``warm``, but launch Chrome on ``executor`` without blocking."""
+        if not self.drivers and not self._starting:
+            self._idle.put_nowait(await self._start())
+
+    def _track(self, driver) -> PooledDriver:
+        pooled = PooledDriver(driver, next(self._numbers))
+        self.drivers.append(pooled)
+        self.stats['started'] += 1
+        return pooled
+
+    async def _start(self) -> PooledDriver:
+        self._starting += 1
+        try:
+            loop = asyncio.get_running_loop()
+            driver = await loop.run_in_executor(self.executor, self.create_driver)
+        finally:
+            self._starting -= 1
+        return self._track(driver)
+
+    def _retire(self, pooled: PooledDriver, reason: str):
+        """Drop a driver from the pool and quit it in the background."""
+        if pooled in self.drivers:
+            self.drivers.remove(pooled)
+        if reason == 'recycled':
+            self.stats['recycled'] += 1
+        else:
+            self.stats['restarts'] += 1
+        logger.info("Retiring browser #%s (%s) after %s page loads", pooled.number, reason, pooled.navigations)
+        try:
+            asyncio.get_running_loop().run_in_executor(self.executor, pooled.quit)
+        except RuntimeError:
+            pooled.quit()
+
+    def _worn_out(self, pooled: PooledDriver) -> bool:
+        if self.max_navigations and pooled.navigations >= self.max_navigations:
+            return True
+        if self.max_rss:
+            rss = pooled.rss()
+            if rss and rss > self.max_rss:
+                return True
+        return False
+
+    async def checkout(self) -> PooledDriver:
+        """Take a live driver out of the pool, starting a new one if allowed."""
+        await self._limit.acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            while True:
+                if self._idle.empty() and len(self.drivers) + self._starting < self.size:
+                    return await self._start()
+                pooled = await self._idle.get()
+                if await loop.run_in_executor(self.executor, pooled.probe):
+                    return pooled
+                # Dead session: drop it, the next pass starts a replacement
+                self._retire(pooled, 'failed liveness probe')
+        except BaseException:
+            self._limit.release()
+            raise
+
+    def checkin(self, pooled: PooledDriver):
+        """Hand a driver back so another check can use it, or retire it."""
+        try:
+            if pooled.broken:
+                self._retire(pooled, 'crashed')
+            elif self._worn_out(pooled):
+                self._retire(pooled, 'recycled')
+            else:
+                self._idle.put_nowait(pooled)
+        finally:
+            self._limit.release()
+
+    @asynccontextmanager
+    async def driver(self):
+        """Borrow a driver for the duration of a ``with`` block."""
+        pooled = await self.checkout()
+        try:
+            yield pooled
+        finally:
+            self.checkin(pooled)
+
+    @property
+    def in_use(self) -> int:
+        return len(self.drivers) - self._idle.qsize()
+
+    def memory(self) -> Dict[int, Optional[int]]:
+        """Current RSS in bytes of each driver's process tree, by driver number."""
+        return {pooled.number: pooled.rss() for pooled in self.drivers}
+
+    def close(self):
+        """Quit every driver owned by the pool."""
+        for pooled in self.drivers:
+            pooled.quit()
+        self.drivers = []
+        self._idle = asyncio.Queue()
+
+class BrowserHandler:
+    """Async front end for the browser pool.
+
+    Every WebDriver call blocks until Chrome answers, so all of them run on a
+    dedicated thread pool with one worker per driver, plus one spare for
+    probing, launching and quitting drivers. The coroutines below only await
+    those workers, which keeps the Discord event loop free to answer
+    commands and heartbeats while pages load. Chrome is not started until a
+    check needs it, unless ``prewarm`` asks for it up front.
+    """
+
+    def __init__(self, pool_size: int = BROWSER_POOL_SIZE, http_fast_path: bool = HTTP_FAST_PATH,
+                 screenshots: bool = ALERT_SCREENSHOTS, prewarm: bool = False, deadline: float = CHECK_DEADLINE):
+        self.executor = ThreadPoolExecutor(max_workers=pool_size + 1, thread_name_prefix="browser")
+        self.pool = BrowserPool(pool_size, self.executor)
+        self.http = HttpStockChecker() if http_fast_path else None
+        self.screenshots = screenshots
+        self.deadline = deadline
+        if prewarm:
+            self.setup_driver()
+
+    @property
+    def concurrency(self) -> int:
+        """Number of checks that can run at the same time."""
+        return self.pool.size
+        
+    def setup_driver(self):
+        """Make sure at least one Chrome driver is ready."""
+        self.pool.warm()
+
+    async def prewarm(self):
+        """Start Chrome in the background so the first browser check need not wait."""
+        try:
+            await self.pool.prewarm()
+        except Exception as e:
+            # The first check that needs Chrome will try again
+            logger.warning("Could not pre-start Chrome: %s", e)
+
+    async def _run(self, func, *args):
+        """Run a blocking WebDriver function on the browser threads.
+
+        The function runs in a copy of the caller's context, so the stages it
+        times count towards the calling check's log record.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, contextvars.copy_context().run, func, *args)
+
+    async def _navigate(self, pooled, func, *args):
+        """Run a page-loading function on a pooled driver.
+
+        Counts the navigation towards the driver's recycling limit and marks
+        the driver broken when the failure is the browser's, not the page's,
+        so the pool replaces it. A call still running after ``deadline``
+        seconds is abandoned and its browser killed, so one hung page load
+        cannot hold a pool slot for good.
+        """
+        pooled.navigations += 1
+        try:
+            return await asyncio.wait_for(self._run(func, pooled.driver, *args), self.deadline)
+        except asyncio.TimeoutError:
+            # The browser thread is still stuck in Chrome; killing the
+            # browser frees it and the pool starts a replacement
+            logger.warning("Browser #%s missed the %ss check deadline, killing it", pooled.number, self.deadline)
+            pooled.kill()
+            raise
+        except PAGE_ERRORS:
+            raise
+        except WebDriverException:
+            pooled.broken = True
+            raise
+        
+    async def get_product_info(self, store: str, url: str) -> dict:
+        """Get product information from the URL.
+
+        Returns ``name``, ``price``, ``url`` and, when the page showed them,
+        ``sizes`` (``{SIZE: in_stock}``) so adding a product doubles as its
+        first check. Returns ``None`` if the page could not be read, and
+        raises ``Throttled`` if the store blocked the request.
+        """
+        if self.http:
             try:
-                name_elem = wait.until(EC.presence_of_element_located((
-                    By.XPATH, '//h1[@data-qa-qualifier="product-detail-info-name"]'
-                )))
-                product_name = name_elem.text.strip()
-            except:
-                logger.error("Could not find product name")
+                info = await self.http.fetch(store, url)
+            except CheckFailed as e:
+                logger.info("Could not read %s: %s", url, e)
                 return None
-            
-            # Get price (if available)
-            price = None
-            try:
-                price_elem = self.driver.find_element(By.XPATH, '//span[@data-qa-qualifier="price"]')
-                price = price_elem.text.strip()
-            except:
-                pass
+            if info:
+                return {
+                    'name': info['name'],
+                    'price': info['price'],
+                    'sizes': info['sizes'],
+                    'url': url
+                }
                 
-            return {
-                'name': product_name,
-                'price': price,
-                'url': url
-            }
+        try:
+            async with self.pool.driver() as pooled:
+                return await self._navigate(pooled, self._get_product_info, store, url)
             
+        except Throttled:
+            raise
         except Exception as e:
-            logger.error(f"Error getting product info: {str(e)}")
+            logger.error("Error getting product info: %s", e)
+            return None
+
+    def _get_product_info(self, driver, store: str, url: str) -> dict:
+        """Load the product page and read its name, price and sizes (blocking)."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        selectors = extraction_selectors(store)
+        load_page(driver, store, url)
+        wait = WebDriverWait(driver, READY_TIMEOUT)
+        try:
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selectors['name'])))
+        except TimeoutException:
+            logger.error("Could not find product name")
+            return None
+        
+        # Open the size selector too, so the same page load gives availability
+        try:
+            if not driver.find_elements(By.CSS_SELECTOR, selectors['sizes']):
+                wait.until(EC.element_to_be_clickable((
+                    By.XPATH, '//button[@data-qa-action="add-to-cart"]'
+                ))).click()
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selectors['sizes'])))
+        except PAGE_ERRORS:
+            logger.info("No sizes shown on %s; the first check will read them", url)
+        
+        info = extract_product(driver, selectors)
+        if not info['name']:
+            logger.error("Could not find product name")
             return None
+        info['url'] = url
+        return info
             
     async def check_stock(self, product):
-        """Check if product is in stock in specified sizes."""
-        try:
-            if not self.driver:
-                self.setup_driver()
+        """Check if product is in stock in specified sizes.
+
+        Returns the in-stock watched sizes and a ``Screenshot``. A
+        screenshot is only taken when a size has come back in stock since
+        the last check, i.e. when an alert will go out. Raises ``Throttled``
+        if the store blocked the check and ``CheckFailed`` saying why if the
+        page could not be read.
+        """
+        http_sizes = None
+        if self.http:
+            with STAGE_SECONDS.time(stage='http_fetch', store=product.store):
+                info = await self.http.fetch(product.store, product.url)
+            if info:
+                http_sizes = [s for s in product.sizes if info['sizes'].get(s)]
+                if not self.screenshots or not set(http_sizes) - product.in_stock_sizes():
+                    return http_sizes, None
+                # A size is back in stock: load the page in Chrome for the
+                # alert screenshot, which also confirms the result.
                 
-            # Wait and navigate
-            time.sleep(random.uniform(1, 2))
-            self.driver.get(product.url)
-            time.sleep(random.uniform(2, 3))
+        try:
+            async with self.pool.driver() as pooled:
+                return await self._navigate(pooled, self._check_stock, product)
             
-            # Wait for add to cart button and click it
-            wait = WebDriverWait(self.driver, 10)
-            add_to_cart = wait.until(EC.presence_of_element_located((
-                By.XPATH, '//button[@data-qa-action="add-to-cart"]'
-            )))
+        except Throttled:
+            if http_sizes is None:
+                raise
+            logger.warning("Blocked loading %s for the screenshot", product.url)
+            return http_sizes, None
+        except Exception as e:
+            if http_sizes is None:
+                raise check_failure(e) from e
+            # Still report what the page data said, just without a screenshot
+            logger.warning("Could not load %s for the screenshot: %s", product.url, e)
+            return http_sizes, None
+
+    def _check_stock(self, driver, product):
+        """Load the product page and read the in-stock sizes (blocking)."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        store = product.store
+        
+        selectors = extraction_selectors(store)
+        with STAGE_SECONDS.time(stage='navigate', store=store):
+            load_page(driver, store, product.url)
+        
+        # Continue as soon as the add to cart button can be clicked
+        wait = WebDriverWait(driver, READY_TIMEOUT)
+        with STAGE_SECONDS.time(stage='wait_for_selector', store=store):
+            try:
+                add_to_cart = wait.until(EC.element_to_be_clickable((
+                    By.XPATH, '//button[@data-qa-action="add-to-cart"]'
+                )))
+            except TimeoutException:
+                if driver.find_elements(By.CSS_SELECTOR, selectors['name']):
+                    # The product page is there, it just cannot be bought
+                    logger.info("No add to cart button, sold out: %s", product.url)
+                    return [], None
+                if driver.execute_script("return document.readyState") == 'complete':
+                    # Loaded, but not a product page: gone, or the markup changed
+                    raise CheckFailed(SELECTOR_MISSING, "no product name or add to cart button")
+                raise CheckFailed(TIMEOUT, f"page not ready after {READY_TIMEOUT}s")
+        with STAGE_SECONDS.time(stage='add_to_cart', store=store):
             add_to_cart.click()
+            try:
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selectors['sizes'])))
+            except TimeoutException:
+                logger.warning("No size buttons on %s", product.url)
+        
+        # Read every size's availability in one round trip
+        with STAGE_SECONDS.time(stage='extract_sizes', store=store):
+            sizes = extract_product(driver, selectors)['sizes']
+        available_sizes = [s for s in product.sizes if sizes.get(s)]
+        
+        # Take screenshot only if a monitored size just came back in stock
+        screenshot = None
+        if self.screenshots and set(available_sizes) - product.in_stock_sizes():
+            with STAGE_SECONDS.time(stage='screenshot', store=store):
+                screenshot = self._capture(driver)
             
-            # Get available sizes
-            available_sizes = []
-            size_elements = self.driver.find_elements(By.XPATH, '//button[@data-qa-action="size-in-stock"]')
-            
-            for element in size_elements:
-                size_text = element.text.strip().upper()
-                if size_text in [s.upper() for s in product.sizes]:
-                    available_sizes.append(size_text)
-            
-            # Take screenshot if any monitored size is available
-            screenshot_path = None
-            if available_sizes:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                screenshot_path = f"screenshots/stock_{timestamp}.png"
-                os.makedirs("screenshots", exist_ok=True)
-                self.driver.save_screenshot(screenshot_path)
-                
-            return available_sizes, screenshot_path
-            
-        except Exception as e:
-            logger.error(f"Error checking stock: {str(e)}")
-            return [], None
+        return available_sizes, screenshot
+
+    def _capture(self, driver):
+        """Capture the size selector (or product area) and encode it in memory."""
+        from selenium.webdriver.common.by import By
+
+        png = None
+        for selector in SCREENSHOT_SELECTORS:
+            elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                try:
+                    png = elements[0].screenshot_as_png
+                    break
+                except WebDriverException:
+                    continue
+        if png is None:
+            png = driver.get_screenshot_as_png()
+        return encode_screenshot(png)
             
+    async def aclose(self):
+        """Close the HTTP session, then the browsers."""
+        if self.http:
+            await self.http.close()
+        self.close()
+        
     def close(self):
-        """Close the browser."""
-        if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
-            self.driver = None
\ No newline at end of file
+        """Close every browser in the pool and stop the browser threads."""
+        self.pool.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""Where the chromedriver binary lives, without asking the network every time.
+
+``ChromeDriverManager().install()`` looks up the latest driver release online
+on every call, which slows each Chrome launch and fails without network
+access. ``chromedriver_path`` resolves the driver once per process, in order:
+
+1. ``CHROMEDRIVER_PATH`` (setting or environment variable), used as is;
+2. the path remembered in ``CHROMEDRIVER_CACHE`` by an earlier run, as long
+   as the file still exists and matches ``CHROMEDRIVER_VERSION`` if pinned;
+3. webdriver_manager, pinned to ``CHROMEDRIVER_VERSION`` when set, whose
+   result is written to ``CHROMEDRIVER_CACHE`` for the next start.
+
+``forget_chromedriver`` drops a remembered path that Chrome refused (e.g.
+after a browser update), so the next launch resolves it again.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Optional
+from settings import CHROMEDRIVER_CACHE, CHROMEDRIVER_PATH, CHROMEDRIVER_VERSION
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()  # drivers are launched from several browser threads
+_resolved: Optional[str] = None
+
+def _explicit_path() -> Optional[str]:
+    return os.getenv('CHROMEDRIVER_PATH') or CHROMEDRIVER_PATH
+
+def _read_cache(path: str = CHROMEDRIVER_CACHE) -> Optional[str]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or not os.path.isfile(cached.get('path') or ''):
+        return None
+    if CHROMEDRIVER_VERSION and cached.get('version') != CHROMEDRIVER_VERSION:
+        return None
+    return cached['path']
+
+def _write_cache(driver_path: str, path: str = CHROMEDRIVER_CACHE):
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'path': driver_path, 'version': CHROMEDRIVER_VERSION}, f)
+    except OSError as e:
+        logger.warning("Could not remember the chromedriver path in %s: %s", path, e)
+
+def _download() -> str:
+    from webdriver_manager.chrome import ChromeDriverManager  # only needed on a cache miss
+
+    logger.info("Resolving chromedriver %s with webdriver_manager", CHROMEDRIVER_VERSION or '(latest)')
+    return ChromeDriverManager(driver_version=CHROMEDRIVER_VERSION).install()
+
+def chromedriver_path() -> str:
+    """Path of the chromedriver binary to launch Chrome with."""
+    global _resolved
+    explicit = _explicit_path()
+    if explicit:
+        return explicit
+    with _lock:
+        if _resolved is None:
+            _resolved = _read_cache()
+            if _resolved is None:
+                _resolved = _download()
+                _write_cache(_resolved)
+        return _resolved
+
+def forget_chromedriver():
+    """Drop the remembered driver so the next launch resolves it again."""
+    global _resolved
+    with _lock:
+        _resolved = None
+        try:
+            os.remove(CHROMEDRIVER_CACHE)
+        except OSError:
+            pass
+
+def pinned_chromedriver() -> bool:
+    """Whether the driver path was given explicitly rather than looked up."""
+    return bool(_explicit_path())
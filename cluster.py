@@ -0,0 +1,212 @@
+"""Sharing one watch list between several bot instances.
+
+Every instance (node) started with ``--node NAME`` keeps its membership alive
+by renewing a lease every ``CLUSTER_HEARTBEAT`` seconds. A node whose lease
+has not been renewed for ``CLUSTER_LEASE_TTL`` seconds counts as dead. The
+live nodes form a consistent-hash ring, and each product key belongs to the
+node the ring maps it to, so a node joining or leaving only moves the keys
+next to it on the ring.
+
+Owning a key additionally needs a claim on it in the lease backend. A key is
+only handed over once its previous holder has released it, or has died, so
+two nodes never check the same product at the same time. Only the holder
+checks a product and sends its alerts.
+
+Backends share the membership and claims:
+
+- ``SQLiteLeases``: tables in the bot's SQLite database, for instances on one
+  host (or a shared filesystem that handles SQLite locking)
+- ``MemoryLeases``: in-process stand-in, e.g. for several nodes in one test
+"""
+import bisect
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Set, Tuple
+from settings import CLUSTER_LEASE_TTL, CLUSTER_VNODES, DB_PATH
+
+logger = logging.getLogger(__name__)
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+class HashRing:
+    """Consistent hashing with ``vnodes`` points per node to even out the load."""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = CLUSTER_VNODES):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in set(nodes) for i in range(vnodes))
+        self.nodes = sorted(set(nodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str) -> str:
+        """The node responsible for ``key``."""
+        if not self._hashes:
+            raise LookupError("Hash ring has no nodes")
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+class MemoryLeases:
+    """Lease backend held in this process; every method mirrors ``SQLiteLeases``."""
+
+    def __init__(self):
+        self.heartbeats: Dict[str, float] = {}  # node -> lease expiry
+        self.claims: Dict[str, str] = {}  # key -> node
+        self._lock = threading.Lock()
+
+    def heartbeat(self, node: str, ttl: float):
+        with self._lock:
+            self.heartbeats[node] = time.time() + ttl
+
+    def leave(self, node: str):
+        with self._lock:
+            self.heartbeats.pop(node, None)
+            self.claims = {key: holder for key, holder in self.claims.items() if holder != node}
+
+    def nodes(self) -> List[str]:
+        now = time.time()
+        with self._lock:
+            return sorted(node for node, expires in self.heartbeats.items() if expires > now)
+
+    def claim(self, node: str, keys: Iterable[str]) -> Set[str]:
+        now = time.time()
+        with self._lock:
+            live = {name for name, expires in self.heartbeats.items() if expires > now}
+            for key in keys:
+                if self.claims.get(key) not in live:
+                    self.claims[key] = node
+            return {key for key, holder in self.claims.items() if holder == node}
+
+    def release(self, node: str, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                if self.claims.get(key) == node:
+                    del self.claims[key]
+
+class SQLiteLeases:
+    """Lease backend in a SQLite file shared by every node.
+
+    Uses its own connection, so its calls can run off the event loop.
+    Expiry times are wall-clock, since they are compared across processes.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cluster_nodes (
+        node TEXT PRIMARY KEY,
+        expires REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS cluster_claims (
+        key TEXT PRIMARY KEY,      -- normalized product URL
+        node TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS cluster_claims_node ON cluster_claims(node);
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def heartbeat(self, node: str, ttl: float):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO cluster_nodes (node, expires) VALUES (?, ?) "
+                "ON CONFLICT(node) DO UPDATE SET expires = excluded.expires",
+                (node, time.time() + ttl)
+            )
+
+    def leave(self, node: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cluster_claims WHERE node = ?", (node,))
+            conn.execute("DELETE FROM cluster_nodes WHERE node = ?", (node,))
+
+    def nodes(self) -> List[str]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT node FROM cluster_nodes WHERE expires > ? ORDER BY node", (time.time(),)
+            ).fetchall()
+        return [node for node, in rows]
+
+    def claim(self, node: str, keys: Iterable[str]) -> Set[str]:
+        """Take the keys that are free or held by a dead node; return all held."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO cluster_claims (key, node) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET node = excluded.node "
+                "WHERE cluster_claims.node NOT IN (SELECT node FROM cluster_nodes WHERE expires > ?)",
+                ((key, node, now) for key in keys)
+            )
+            rows = conn.execute("SELECT key FROM cluster_claims WHERE node = ?", (node,)).fetchall()
+        return {key for key, in rows}
+
+    def release(self, node: str, keys: Iterable[str]):
+        with self._transaction() as conn:
+            conn.executemany(
+                "DELETE FROM cluster_claims WHERE key = ? AND node = ?",
+                ((key, node) for key in keys)
+            )
+
+    def close(self):
+        self.conn.close()
+
+class ClusterNode:
+    """This instance's view of the cluster and of the product keys it owns.
+
+    ``rebalance`` renews the node's lease, rebuilds the ring from the live
+    nodes and settles which of ``keys`` this node holds: keys the ring now
+    gives to another node are released, and keys it gives to this node are
+    claimed once their previous holder has let go. It blocks on the backend,
+    so the bot calls it on a worker thread.
+    """
+
+    def __init__(self, node: str, leases, ttl: float = CLUSTER_LEASE_TTL, vnodes: int = CLUSTER_VNODES):
+        self.node = node
+        self.leases = leases
+        self.ttl = ttl
+        self.vnodes = vnodes
+        self.ring = HashRing([node], vnodes)
+        self.owned: Set[str] = set()
+
+    def owns(self, key: str) -> bool:
+        """Whether this node should check the product ``key``."""
+        return key in self.owned
+
+    def handles(self, name: str) -> bool:
+        """Whether this node answers for ``name``, e.g. a channel's commands."""
+        return self.ring.owner(name) == self.node
+
+    def rebalance(self, keys: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """Update ownership of ``keys``; returns (keys gained, keys lost)."""
+        self.leases.heartbeat(self.node, self.ttl)
+        nodes = self.leases.nodes()
+        if nodes != self.ring.nodes:
+            logger.info("Cluster nodes: %s", ', '.join(nodes))
+            self.ring = HashRing(nodes or [self.node], self.vnodes)
+        wanted = {key for key in keys if self.ring.owner(key) == self.node}
+        self.leases.release(self.node, self.owned - wanted)
+        held = self.leases.claim(self.node, wanted - self.owned) & wanted
+        gained, lost = held - self.owned, self.owned - held
+        self.owned = held
+        return gained, lost
+
+    def leave(self):
+        """Give up every key at once so the other nodes take over right away."""
+        self.leases.leave(self.node)
+        self.owned = set()
@@ -0,0 +1,52 @@
+"""Read a product page in one WebDriver round trip.
+
+Every ``find_elements`` and ``element.text`` call is a separate HTTP request
+to chromedriver. ``extract_product`` instead runs a single script in the
+page that returns the name, price and availability of every size as one
+JSON object.
+"""
+from settings import EXTRACTION_SELECTORS
+
+# arguments[0] is a selector dict from EXTRACTION_SELECTORS
+EXTRACT_PRODUCT_JS = """
+var selectors = arguments[0];
+var soldOut = /OUT OF STOCK|SOLD OUT|AGOTADO/i;
+function text(el) {
+    return el ? (el.innerText || el.textContent || '').trim() : null;
+}
+var sizes = {};
+var buttons = document.querySelectorAll(selectors.sizes);
+for (var i = 0; i < buttons.length; i++) {
+    var el = buttons[i];
+    var label = text(el);
+    if (!label) continue;
+    var size = label.split('\\n')[0].replace(soldOut, '').trim().toUpperCase();
+    var inStock = !el.disabled
+        && el.getAttribute('aria-disabled') !== 'true'
+        && !soldOut.test(label)
+        && (!selectors.in_stock || el.matches(selectors.in_stock));
+    sizes[size] = sizes[size] || inStock;
+}
+return {
+    name: text(document.querySelector(selectors.name)),
+    price: text(document.querySelector(selectors.price)),
+    sizes: sizes
+};
+"""
+
+def extraction_selectors(store: str) -> dict:
+    """The store's extraction selectors, falling back to the default ones."""
+    return EXTRACTION_SELECTORS.get(store, EXTRACTION_SELECTORS['default'])
+
+def extract_product(driver, selectors: dict) -> dict:
+    """Name, price and ``{SIZE: in_stock}`` of the loaded page (blocking).
+
+    Name and price are ``None`` when the page has no such element; sizes is
+    empty until the size selector has been rendered.
+    """
+    result = driver.execute_script(EXTRACT_PRODUCT_JS, selectors) or {}
+    return {
+        'name': result.get('name') or None,
+        'price': result.get('price') or None,
+        'sizes': {size: bool(available) for size, available in (result.get('sizes') or {}).items()}
+    }
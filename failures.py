@@ -0,0 +1,103 @@
+"""Why checks fail, and pausing stores that keep failing.
+
+``CheckFailed.kind`` is the check outcome recorded for a failed check:
+
+- ``timeout``: the page or the browser did not answer in time
+- ``not_found``: the store answered with one of ``GONE_STATUSES``
+- ``selector_missing``: the page loaded without a product name or add to
+  cart button, e.g. a discontinued product redirected to a category page
+- ``failed``: anything else, such as a crashed browser
+
+Blocked requests raise ``Throttled`` instead and count as ``throttled``.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from settings import CHECK_DEADLINE, STORE_BREAKER
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = 'timeout'
+NOT_FOUND = 'not_found'
+SELECTOR_MISSING = 'selector_missing'
+FAILED = 'failed'
+
+class CheckFailed(Exception):
+    """A stock check could not read the product, and why."""
+
+    def __init__(self, kind: str, detail: str = ''):
+        super().__init__(kind, detail)
+        self.kind = kind
+        self.detail = detail
+
+    def __str__(self):
+        return f"{self.kind}: {self.detail}" if self.detail else self.kind
+
+@dataclass
+class Circuit:
+    failures: int = 0  # store checks failed in a row
+    cooldown: float = 0.0  # current pause; doubles after a failed probe
+    until: Optional[float] = None  # checks paused until then; None when closed
+    probe: Optional[str] = None  # product checked to see if the store is back
+    probe_started: float = 0.0
+
+class CircuitBreaker:
+    """Per-store circuit breaker in front of the check scheduler.
+
+    ``STORE_BREAKER['failures']`` failed checks of a store in a row open its
+    circuit: ``delay`` keeps every product of the store waiting for the
+    cooldown. After that a single product is let through as a probe. Any
+    result other than one of ``STORE_BREAKER['outcomes']`` means the store
+    answered and closes the circuit again; a failed probe reopens it for
+    twice as long.
+    """
+
+    def __init__(self, breaker: dict = STORE_BREAKER, probe_timeout: float = CHECK_DEADLINE * 2):
+        self.threshold = breaker['failures']
+        self.cooldown = breaker['cooldown']
+        self.max_cooldown = breaker['max_cooldown']
+        self.outcomes = frozenset(breaker['outcomes'])
+        self.probe_timeout = probe_timeout  # a probe that never reports is replaced
+        self.circuits: Dict[str, Circuit] = {}
+
+    def delay(self, store: str, key: str) -> float:
+        """Seconds product ``key`` has to wait before it may be checked."""
+        circuit = self.circuits.get(store)
+        if circuit is None or circuit.until is None:
+            return 0.0
+        now = time.monotonic()
+        if now < circuit.until:
+            return circuit.until - now
+        if circuit.probe in (None, key) or now - circuit.probe_started > self.probe_timeout:
+            circuit.probe = key
+            circuit.probe_started = now
+            return 0.0
+        return min(self.cooldown, self.probe_timeout)
+
+    def record(self, store: str, key: str, outcome: str):
+        """Count a finished check of product ``key`` of the store."""
+        circuit = self.circuits.setdefault(store, Circuit())
+        if outcome not in self.outcomes:
+            if circuit.until is not None:
+                logger.info("%s is answering again, resuming its checks", store)
+            circuit.failures = 0
+            circuit.until = circuit.probe = None
+            return
+        circuit.failures += 1
+        if circuit.until is None:
+            if circuit.failures < self.threshold:
+                return
+            circuit.cooldown = self.cooldown
+        elif circuit.probe == key:
+            circuit.cooldown = min(circuit.cooldown * 2, self.max_cooldown)
+        else:
+            return  # started before the circuit opened
+        circuit.until = time.monotonic() + circuit.cooldown
+        circuit.probe = None
+        logger.warning("%s failed %s checks in a row (%s), pausing its checks for %.0fs",
+                       store, circuit.failures, outcome, circuit.cooldown)
+
+    def states(self) -> Dict[Tuple[str], int]:
+        """1 for every store whose checks are paused, 0 for the others tracked."""
+        return {(store,): int(circuit.until is not None) for store, circuit in self.circuits.items()}
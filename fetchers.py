@@ -0,0 +1,211 @@
+import aiohttp
+import asyncio
+import json
+import logging
+import random
+import re
+from typing import List, Optional
+from failures import NOT_FOUND, CheckFailed
+from ratelimit import Throttled
+from settings import GONE_STATUSES, HTTP_POOL_SIZE, HTTP_TIMEOUT, THROTTLE_STATUSES, USER_AGENTS
+
+logger = logging.getLogger(__name__)
+
+LD_JSON_RE = re.compile(
+    r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>',
+    re.DOTALL | re.IGNORECASE
+)
+VIEW_PAYLOAD_RE = re.compile(
+    r'window\.zara\.viewPayload\s*=\s*(\{.*?\})\s*;?\s*</script>',
+    re.DOTALL
+)
+
+IN_STOCK = {'in_stock', 'low_on_stock', 'instock', 'limitedavailability'}
+
+def _availability(value) -> bool:
+    """Map an availability flag from page data to in stock / not in stock."""
+    if isinstance(value, bool):
+        return value
+    if not isinstance(value, str):
+        return False
+    # schema.org values look like "https://schema.org/InStock"
+    return value.rsplit('/', 1)[-1].lower() in IN_STOCK
+
+def parse_ld_json(html: str) -> Optional[dict]:
+    """Read name, price and sizes from schema.org Product blocks.
+
+    The stores publish one ``Product`` per size, each carrying a ``size``
+    and an ``offers`` entry with its availability.
+    """
+    name = None
+    price = None
+    sizes = {}
+    for block in LD_JSON_RE.findall(html):
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        nodes = data if isinstance(data, list) else [data]
+        for node in nodes:
+            if not isinstance(node, dict) or node.get('@type') != 'Product':
+                continue
+            name = name or node.get('name')
+            offers = node.get('offers') or {}
+            if isinstance(offers, list):
+                offers = offers[0] if offers else {}
+            if price is None and offers.get('price') is not None:
+                price = f"{offers['price']} {offers.get('priceCurrency', '')}".strip()
+            size = node.get('size')
+            if size:
+                sizes[str(size).strip().upper()] = _availability(offers.get('availability'))
+    if not name or not sizes:
+        return None
+    return {'name': name, 'price': price, 'sizes': sizes}
+
+def _find_sizes(node) -> Optional[List[dict]]:
+    """Depth-first search for the first list of sized availability records."""
+    if isinstance(node, dict):
+        sizes = node.get('sizes')
+        if isinstance(sizes, list) and sizes and all(
+            isinstance(s, dict) and 'name' in s and 'availability' in s for s in sizes
+        ):
+            return sizes
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = _find_sizes(child)
+        if found:
+            return found
+    return None
+
+def parse_view_payload(html: str) -> Optional[dict]:
+    """Read name, price and sizes from Zara's embedded ``viewPayload``."""
+    match = VIEW_PAYLOAD_RE.search(html)
+    if not match:
+        return None
+    try:
+        payload = json.loads(match.group(1))
+    except ValueError:
+        return None
+    product = payload.get('product') or {}
+    sizes = _find_sizes(product)
+    if not product.get('name') or not sizes:
+        return None
+    price = None
+    amount = sizes[0].get('price')
+    if isinstance(amount, int):
+        # Prices are published in cents
+        price = f"{amount / 100:.2f} {payload.get('currency', '')}".strip()
+    return {
+        'name': product['name'],
+        'price': price,
+        'sizes': {
+            str(s['name']).strip().upper(): _availability(s['availability'])
+            for s in sizes
+        }
+    }
+
+class StoreFetcher:
+    """Reads availability for one store from its product page data.
+
+    Subclasses list the parsers that understand the store's page; the first
+    one that returns a result wins.
+    """
+
+    parsers = (parse_ld_json,)
+
+    def parse(self, html: str) -> Optional[dict]:
+        for parser in self.parsers:
+            try:
+                info = parser(html)
+            except Exception as e:
+                logger.debug("%s failed: %s", parser.__name__, e)
+                continue
+            if info:
+                return info
+        return None
+
+class ZaraFetcher(StoreFetcher):
+    parsers = (parse_view_payload, parse_ld_json)
+
+class PullAndBearFetcher(StoreFetcher):
+    parsers = (parse_ld_json,)
+
+class BershkaFetcher(StoreFetcher):
+    parsers = (parse_ld_json,)
+
+FETCHERS = {
+    'zara': ZaraFetcher(),
+    'pullandbear': PullAndBearFetcher(),
+    'bershka': BershkaFetcher()
+}
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header; HTTP dates are ignored."""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+class HttpStockChecker:
+    """Browserless stock lookups over a shared, keep-alive HTTP session.
+
+    ``fetch`` returns ``None`` whenever the page cannot be read or parsed, so
+    callers can fall back to a real browser.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, timeout: float = HTTP_TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    'User-Agent': random.choice(USER_AGENTS),
+                    'Accept': 'text/html,application/xhtml+xml',
+                    'Accept-Language': 'en-US,en;q=0.9'
+                }
+            )
+        return self.session
+
+    async def fetch(self, store: str, url: str) -> Optional[dict]:
+        """Return ``{'name', 'price', 'sizes': {SIZE: in_stock}}`` or ``None``.
+
+        Raises ``Throttled`` when the store blocks or rate limits the request
+        and ``CheckFailed`` when the product page is gone.
+        """
+        fetcher = FETCHERS.get(store)
+        if not fetcher:
+            return None
+        try:
+            async with self._session().get(url) as response:
+                if response.status in THROTTLE_STATUSES:
+                    # Going to the browser would only hit the store again
+                    raise Throttled(response.status, _retry_after(response.headers.get('Retry-After')))
+                if response.status in GONE_STATUSES:
+                    # Chrome would get the same answer
+                    raise CheckFailed(NOT_FOUND, f"HTTP {response.status}")
+                if response.status != 200:
+                    logger.info("HTTP %s for %s, falling back to browser", response.status, url)
+                    return None
+                html = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.info("HTTP fetch failed for %s: %s", url, e)
+            return None
+        info = fetcher.parse(html)
+        if not info:
+            logger.info("No product data found in %s, falling back to browser", url)
+        return info
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
@@ -0,0 +1,131 @@
+"""Local stand-in for the store websites, serving the pages in ``fixtures/``.
+
+Any path under ``/<store>/`` returns that store's fixture page, so product
+URLs such as ``http://127.0.0.1:8099/zara/blazer-p0123.html`` can be fed to
+``!monitor`` or to ``BrowserHandler`` without touching the real sites.
+``/assets/`` serves dummy images, fonts, video and scripts so the pages load
+about as much as the real ones do.
+
+    python fixture_server.py --port 8099
+"""
+import argparse
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from settings import STORES
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Stand-ins for the images, fonts, video and trackers a real product page
+# pulls in, sized like their typical live counterparts
+ASSETS = {
+    ".jpg": ("image/jpeg", 180_000),
+    ".woff2": ("font/woff2", 45_000),
+    ".mp4": ("video/mp4", 600_000),
+    ".js": ("application/javascript", 90_000)
+}
+
+def _asset(path: str):
+    """Content type and body for an ``/assets/...`` request, or ``None``."""
+    extension = os.path.splitext(path)[1]
+    if extension not in ASSETS:
+        return None
+    content_type, size = ASSETS[extension]
+    if extension == ".js":
+        return content_type, b"//" + b"x" * (size - 2)
+    return content_type, bytes(size)
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real stores
+
+    def do_GET(self):
+        store = self.path.lstrip('/').split('/', 1)[0]
+        content_type = "text/html; charset=utf-8"
+        body = self.server.pages.get(store)
+        if body is not None and self.server.latency:
+            # Simulated store response time, +/- 50%
+            time.sleep(self.server.latency * random.uniform(0.5, 1.5))
+        if store == "assets":
+            asset = _asset(self.path)
+            if asset:
+                content_type, body = asset
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+class FixtureHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # benchmarks open many connections at once
+
+class FixtureServer:
+    """Serve the fixture pages from a background thread.
+
+    Usable as a context manager; ``url(store)`` builds a product URL that the
+    server will answer for that store. ``latency`` delays every product page
+    by about that many seconds, to stand in for a real store's response time.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.httpd = FixtureHTTPServer((host, port), FixtureHandler)
+        self.httpd.latency = latency  # mean seconds added to each product page
+        self.httpd.pages = {}
+        for store in STORES:
+            with open(os.path.join(FIXTURE_DIR, f"{store}.html"), "rb") as f:
+                self.httpd.pages[store] = f.read()
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, store: str, slug: str = "product") -> str:
+        return f"{self.base_url}/{store}/{slug}.html"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean seconds per product page")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.host, args.port, args.latency)
+    for store in STORES:
+        print(server.url(store))
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
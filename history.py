@@ -0,0 +1,266 @@
+"""Availability history of every product, kept small enough for months of checks.
+
+Each check adds one 16-byte sample: the time (uint32 seconds), a bitmap of
+the in-stock sizes (bit ``i`` is the product's ``i``-th size in
+``history_sizes``) and the price (float32, NaN when unknown). Samples are
+buffered in ``array`` columns and appended to SQLite as one blob per product
+every ``HISTORY_FLUSH_INTERVAL`` seconds; nothing already written is
+rewritten until ``compact``.
+
+``compact`` downsamples by age according to ``HISTORY_TIERS``: recent
+samples stay as checked, older ones are merged into one sample per hour and
+then per day. A merged sample counts a size as in stock if it was at any
+check in its bucket and keeps the bucket's last price, so short restocks
+and price changes survive downsampling.
+"""
+import json
+import logging
+import math
+import sqlite3
+import time
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from settings import DB_PATH, HISTORY_MAX_AGE, HISTORY_TIERS
+
+logger = logging.getLogger(__name__)
+
+MAX_SIZES = 64  # bits in a sample's bitmap
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_sizes (
+    key TEXT PRIMARY KEY,      -- normalized product URL
+    sizes TEXT NOT NULL        -- JSON list; a sample's bit i is sizes[i]
+);
+CREATE TABLE IF NOT EXISTS history_chunks (
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,      -- chunks of a product in append order
+    samples BLOB NOT NULL,     -- times, then bitmaps, then prices
+    PRIMARY KEY (key, seq)
+);
+"""
+
+@dataclass
+class Samples:
+    """Column arrays of history samples, oldest first."""
+    times: array = field(default_factory=lambda: array('I'))
+    bits: array = field(default_factory=lambda: array('Q'))
+    prices: array = field(default_factory=lambda: array('f'))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, when: int, bits: int, price: float):
+        self.times.append(when)
+        self.bits.append(bits)
+        self.prices.append(price)
+
+    def extend(self, other: 'Samples'):
+        self.times.extend(other.times)
+        self.bits.extend(other.bits)
+        self.prices.extend(other.prices)
+
+    def to_bytes(self) -> bytes:
+        return self.times.tobytes() + self.bits.tobytes() + self.prices.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Samples':
+        samples = cls()
+        count = len(data) // (samples.times.itemsize + samples.bits.itemsize + samples.prices.itemsize)
+        split = count * samples.times.itemsize
+        samples.times.frombytes(data[:split])
+        samples.bits.frombytes(data[split:split + count * samples.bits.itemsize])
+        samples.prices.frombytes(data[split + count * samples.bits.itemsize:])
+        return samples
+
+def downsample(samples: Samples, now: float, tiers=HISTORY_TIERS, max_age: Optional[float] = HISTORY_MAX_AGE) -> Samples:
+    """Merge samples into the bucket size their age calls for; drop expired ones."""
+    result = Samples()
+    bucket = None
+    for when, bits, price in zip(samples.times, samples.bits, samples.prices):
+        age = now - when
+        if max_age and age > max_age:
+            continue
+        resolution = next((size for limit, size in tiers if limit is None or age <= limit), None)
+        current = (resolution, when // resolution) if resolution else None
+        if current is not None and current == bucket:
+            result.bits[-1] |= bits
+            result.prices[-1] = price if not math.isnan(price) else result.prices[-1]
+            continue
+        bucket = current
+        result.append(when, bits, price)
+    return result
+
+@dataclass
+class Timeline:
+    """What ``HistoryStore.timeline`` found for one product."""
+    first: Optional[datetime] = None  # oldest sample
+    last: Optional[datetime] = None  # newest sample
+    samples: int = 0
+    # size -> [(back in stock, sold out again or None while still in stock)]
+    restocks: Dict[str, List[Tuple[datetime, Optional[datetime]]]] = field(default_factory=dict)
+    prices: List[Tuple[datetime, float]] = field(default_factory=list)  # every price change
+
+class HistoryStore:
+    """Append-only availability history in the bot's SQLite database.
+
+    Only samples not flushed yet and each product's size list are held in
+    memory; a query reads the product's chunks back from disk.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.sizes: Dict[str, List[str]] = {
+            key: json.loads(sizes) for key, sizes in self.conn.execute("SELECT key, sizes FROM history_sizes")
+        }
+        self.pending: Dict[str, Samples] = {}  # key -> samples not flushed yet
+
+    def _bits(self, key: str, in_stock: Iterable[str]) -> int:
+        in_stock = list(in_stock)
+        sizes = self.sizes.get(key, [])
+        if any(size not in sizes for size in in_stock):
+            sizes = self._assign(key, in_stock)
+        bits = 0
+        for size in in_stock:
+            if size in sizes:
+                bits |= 1 << sizes.index(size)
+        return bits
+
+    def _assign(self, key: str, new_sizes: Iterable[str]) -> List[str]:
+        """Give sizes the next free bits of a product.
+
+        Bit positions are shared by every instance writing to the database
+        (a product can move between them) and only ever appended, so the list
+        is re-read under a write lock before anything is added to it.
+        """
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            sizes = self._stored_sizes(key)
+            added = False
+            for size in new_sizes:
+                if size in sizes:
+                    continue
+                if len(sizes) >= MAX_SIZES:
+                    logger.warning("History of %s tracks at most %s sizes; ignoring %s", key, MAX_SIZES, size)
+                    continue
+                sizes.append(size)
+                added = True
+            if added:
+                self.conn.execute(
+                    "INSERT INTO history_sizes (key, sizes) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET sizes = excluded.sizes",
+                    (key, json.dumps(sizes))
+                )
+        self.sizes[key] = sizes
+        return sizes
+
+    def _stored_sizes(self, key: str) -> List[str]:
+        row = self.conn.execute("SELECT sizes FROM history_sizes WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def record(self, key: str, in_stock: Iterable[str], price: Optional[float], when: Optional[float] = None):
+        """Add one check result: the sizes in stock and the price."""
+        bits = self._bits(key, in_stock)
+        samples = self.pending.setdefault(key, Samples())
+        samples.append(int(when if when is not None else time.time()), bits,
+                       price if price is not None else math.nan)
+
+    def flush(self):
+        """Append every product's buffered samples as one chunk each."""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT INTO history_chunks (key, seq, samples) VALUES (?, "
+                "(SELECT COALESCE(MAX(seq), 0) + 1 FROM history_chunks WHERE key = ?), ?)",
+                ((key, key, samples.to_bytes()) for key, samples in pending.items())
+            )
+
+    def read(self, key: str) -> Samples:
+        """Every sample of a product, oldest first, including unflushed ones."""
+        samples = Samples()
+        for data, in self.conn.execute(
+            "SELECT samples FROM history_chunks WHERE key = ? ORDER BY seq", (key,)
+        ):
+            samples.extend(Samples.from_bytes(data))
+        if key in self.pending:
+            samples.extend(self.pending[key])
+        return samples
+
+    def keys(self) -> List[str]:
+        return [key for key, in self.conn.execute("SELECT DISTINCT key FROM history_chunks")]
+
+    def compact(self, key: str, now: Optional[float] = None) -> int:
+        """Downsample a product's flushed samples into a single chunk.
+
+        Returns the number of samples saved.
+        """
+        rows = self.conn.execute(
+            "SELECT samples FROM history_chunks WHERE key = ? ORDER BY seq", (key,)
+        ).fetchall()
+        samples = Samples()
+        for data, in rows:
+            samples.extend(Samples.from_bytes(data))
+        compacted = downsample(samples, now if now is not None else time.time())
+        if len(rows) <= 1 and len(compacted) == len(samples):
+            return 0
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM history_chunks WHERE key = ?", (key,))
+            if len(compacted):
+                self.conn.execute(
+                    "INSERT INTO history_chunks (key, seq, samples) VALUES (?, 1, ?)",
+                    (key, compacted.to_bytes())
+                )
+        return len(samples) - len(compacted)
+
+    def forget(self, key: str):
+        """Delete a product's history."""
+        self.pending.pop(key, None)
+        self.sizes.pop(key, None)
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM history_chunks WHERE key = ?", (key,))
+            self.conn.execute("DELETE FROM history_sizes WHERE key = ?", (key,))
+
+    def timeline(self, key: str, sizes: Optional[Iterable[str]] = None) -> Timeline:
+        """Restock periods of ``sizes`` (all sizes seen if None) and price changes."""
+        samples = self.read(key)
+        # Another instance may have added sizes since this one last looked
+        known = self.sizes[key] = self._stored_sizes(key)
+        wanted = [size for size in (sizes if sizes is not None else known) if size in known]
+        result = Timeline(samples=len(samples), restocks={size: [] for size in wanted})
+        if not len(samples):
+            return result
+        result.first = datetime.fromtimestamp(samples.times[0])
+        result.last = datetime.fromtimestamp(samples.times[-1])
+
+        masks = {size: 1 << known.index(size) for size in wanted}
+        previous_bits = 0
+        previous_price = math.nan
+        for when, bits, price in zip(samples.times, samples.bits, samples.prices):
+            changed = bits ^ previous_bits
+            if changed:
+                moment = datetime.fromtimestamp(when)
+                for size, mask in masks.items():
+                    if not changed & mask:
+                        continue
+                    if bits & mask:
+                        result.restocks[size].append((moment, None))
+                    elif result.restocks[size]:
+                        result.restocks[size][-1] = (result.restocks[size][-1][0], moment)
+                previous_bits = bits
+            if not math.isnan(price) and price != previous_price:
+                result.prices.append((datetime.fromtimestamp(when), price))
+                previous_price = price
+        return result
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,117 @@
+"""Watch lists from ``config.json`` and uploaded JSON or CSV files.
+
+``parse_watch_list`` turns a file into validated ``WatchEntry`` objects, one
+per unique product URL, plus a list of human-readable problems for the
+entries it had to skip. Adding the entries is up to
+``StockMonitorCog.import_products``.
+
+JSON is either a list of products or an object with a ``products`` list, as
+in ``config.json``. Each product needs ``url`` and ``sizes``; ``store`` is
+optional when the URL's host names the store. CSV needs a header row with
+``url`` and ``sizes`` columns (sizes separated by spaces, ``;`` or ``|``) and
+an optional ``store`` column.
+"""
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+from registry import normalize_url
+from settings import STORES
+
+SIZE_SEPARATORS = re.compile(r'[\s;|,]+')
+
+@dataclass
+class WatchEntry:
+    url: str
+    store: str
+    sizes: List[str] = field(default_factory=list)
+    name: Optional[str] = None  # name given in the file, if any
+
+def detect_store(url: str) -> Optional[str]:
+    """Store code whose name appears in the URL's host, e.g. www.zara.com."""
+    host = urlsplit(url).hostname or ''
+    for store in STORES:
+        if store in host.split('.'):
+            return store
+    return None
+
+def _split_sizes(sizes) -> List[str]:
+    if isinstance(sizes, str):
+        sizes = SIZE_SEPARATORS.split(sizes)
+    return [str(size).strip().upper() for size in sizes or [] if str(size).strip()]
+
+def _entry(item: dict, where: str) -> Tuple[Optional[WatchEntry], Optional[str]]:
+    """Validate one raw product record; returns the entry or a problem."""
+    if not isinstance(item, dict):
+        return None, f"{where}: expected an object with url and sizes"
+    url = str(item.get('url') or '').strip()
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return None, f"{where}: invalid URL {url!r}"
+    store = str(item.get('store') or '').strip().lower() or detect_store(url)
+    if store not in STORES:
+        return None, f"{where}: unknown store for {url}"
+    sizes = _split_sizes(item.get('sizes'))
+    if not sizes:
+        return None, f"{where}: no sizes for {url}"
+    return WatchEntry(url=url, store=store, sizes=sizes, name=item.get('name') or None), None
+
+def _records(data: str, filename: str) -> List[Tuple[str, dict]]:
+    """Raw (location, record) pairs from a JSON or CSV document."""
+    if filename.lower().endswith('.csv'):
+        reader = csv.DictReader(io.StringIO(data))
+        fields = [name.strip().lower() for name in reader.fieldnames or []]
+        if 'url' not in fields or 'sizes' not in fields:
+            raise ValueError("CSV needs a header row with url and sizes columns")
+        reader.fieldnames = fields
+        return [(f"line {reader.line_num}", row) for row in reader]
+
+    document = json.loads(data)
+    if isinstance(document, dict):
+        document = document.get('products')
+    if not isinstance(document, list):
+        raise ValueError("JSON needs a list of products or a 'products' list")
+    return [(f"product {index}", item) for index, item in enumerate(document, 1)]
+
+def parse_watch_list(data, filename: str = "watchlist.json") -> Tuple[List[WatchEntry], List[str]]:
+    """Validated, deduplicated entries and a list of skipped-entry problems.
+
+    ``data`` is text or bytes. Entries for the same product URL are merged
+    into one with the union of their sizes. Raises ``ValueError`` when the
+    file as a whole cannot be read.
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    try:
+        records = _records(data, filename)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV: {e}")
+
+    entries = {}
+    problems = []
+    for where, record in records:
+        entry, problem = _entry(record, where)
+        if problem:
+            problems.append(problem)
+            continue
+        key = normalize_url(entry.url)
+        if key in entries:
+            merged = entries[key].sizes
+            merged.extend(size for size in entry.sizes if size not in merged)
+        else:
+            entries[key] = entry
+    return list(entries.values()), problems
+
+def load_config(path: str) -> Tuple[List[WatchEntry], List[str], Optional[int]]:
+    """Entries, problems and the ``channel_id`` to alert, from a JSON config."""
+    with open(path, encoding='utf-8') as f:
+        data = f.read()
+    entries, problems = parse_watch_list(data, path)
+    document = json.loads(data)
+    channel_id = document.get('channel_id') if isinstance(document, dict) else None
+    return entries, problems, channel_id
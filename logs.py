@@ -0,0 +1,130 @@
+"""Logging that never makes the monitor loop wait on a disk or a terminal.
+
+``setup_logging`` gives the root logger a single ``QueueHandler``: logging a
+record only puts it on an in-memory queue, and a ``QueueListener`` thread
+writes it to ``LOG_PATH`` and stderr. Both files rotate by size.
+
+Every finished check is also written to the ``checks`` logger as one compact
+JSON line in ``CHECK_LOG_PATH``, for example::
+
+    {"ts":"2026-10-16T12:00:01","product":"https://www.zara.com/...","store":"zara",
+     "outcome":"ok","ms":812.4,"stages":{"navigate":640.2,"extract_sizes":12.9}}
+
+Check worker processes send their records to the bot process over a
+``multiprocessing`` queue (see ``forward_logs``), so there is one set of
+files however many workers run.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime
+from typing import Optional
+from settings import CHECK_LOG_PATH, LOG_BACKUPS, LOG_LEVEL, LOG_MAX_BYTES, LOG_PATH
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+check_logger = logging.getLogger('checks')
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class CheckFormatter(logging.Formatter):
+    """One JSON object per line from the ``check`` dict of a record."""
+
+    def format(self, record):
+        fields = {'ts': datetime.fromtimestamp(record.created).isoformat(timespec='seconds')}
+        fields.update(getattr(record, 'check', None) or {'message': record.getMessage()})
+        return json.dumps(fields, separators=(',', ':'), ensure_ascii=False)
+
+def _only(name: str, wanted: bool):
+    """Filter passing records of logger ``name`` (or, with False, all others)."""
+    return lambda record: (record.name == name) == wanted
+
+def _rotating(path: str) -> logging.Handler:
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding='utf-8'
+    )
+
+def node_path(path: Optional[str], node: Optional[str]) -> Optional[str]:
+    """``path`` with the node name before its extension, e.g. ``checks.a.log``.
+
+    Nodes on one host each rotate their own files instead of each other's.
+    """
+    if not path or not node:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{node}{ext}"
+
+def setup_logging(level: str = LOG_LEVEL, path: Optional[str] = LOG_PATH,
+                  check_path: Optional[str] = CHECK_LOG_PATH):
+    """Send every log record through a queue to a background writer thread.
+
+    Calling it again does nothing, so every entry point can call it.
+    """
+    global _listener
+    if _listener:
+        return
+    formatter = logging.Formatter(FORMAT)
+    handlers = [logging.StreamHandler()]
+    if path:
+        handlers.append(_rotating(path))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.addFilter(_only(check_logger.name, False))
+    if check_path:
+        handler = _rotating(check_path)
+        handler.setFormatter(CheckFormatter())
+        handler.addFilter(_only(check_logger.name, True))
+        handlers.append(handler)
+    else:
+        check_logger.disabled = True  # don't even build the records
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Write out what is still queued and stop the writer thread."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+def log_check(fields: dict):
+    """Write one check record to ``CHECK_LOG_PATH``."""
+    if check_logger.isEnabledFor(logging.INFO):
+        check_logger.info("check", extra={'check': fields})
+
+class _Relay(logging.Handler):
+    """Hand a record from another process to the local logger of the same name."""
+
+    def handle(self, record):
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+        return True
+
+def forward_logs(records) -> logging.handlers.QueueListener:
+    """Log the records worker processes put on ``records`` as if they were local.
+
+    The caller stops the returned listener when the workers are gone.
+    """
+    listener = logging.handlers.QueueListener(records, _Relay())
+    listener.start()
+    return listener
+
+def setup_worker_logging(records, level: str = LOG_LEVEL):
+    """In a worker process: send every record to the bot process."""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
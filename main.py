@@ -1,29 +1,37 @@
+import argparse
 import os
-import logging
 from dotenv import load_dotenv
 from bot import run_bot
+from logs import node_path, setup_logging
+from settings import CHECK_LOG_PATH, CHECK_WORKERS, CLUSTER_NODE_ID, LOG_PATH, METRICS_PORT
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('stock_monitor.log'),
-        logging.StreamHandler()
-    ]
-)
-
 def main():
+    parser = argparse.ArgumentParser(description="Discord stock monitor bot")
+    parser.add_argument(
+        "--workers", type=int, default=CHECK_WORKERS,
+        help="run checks in this many worker processes (0: inside the bot process)"
+    )
+    parser.add_argument(
+        "--node", default=CLUSTER_NODE_ID,
+        help="share the saved products with other instances under this node name"
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=METRICS_PORT,
+        help="serve /metrics on this port (0: off); give every node on a host its own"
+    )
+    args = parser.parse_args()
+    setup_logging(path=node_path(LOG_PATH, args.node), check_path=node_path(CHECK_LOG_PATH, args.node))
+    
     # Get Discord bot token from environment variable
     token = os.getenv('DISCORD_TOKEN')
     if not token:
         raise ValueError("Please set the DISCORD_TOKEN environment variable")
         
     # Run the bot
-    run_bot(token)
+    run_bot(token, args.workers, args.node, args.metrics_port)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""Process-wide metrics in the Prometheus text format.
+
+Histograms, counters and gauges are plain thread-safe objects, so browser
+worker threads can record into them directly. ``MetricsServer`` serves the
+registry on ``/metrics`` from the bot's event loop.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from aiohttp import web
+from settings import METRICS_HOST, METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a fast HTTP check through a slow Chrome page load
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in self.values.items()]
+
+class Gauge(Metric):
+    """A value that is set directly, or read from a callback at scrape time.
+
+    A callback returns a number, or for labelled gauges a dict mapping label
+    value tuples to numbers.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, help, labels=(), callback: Callable[[], float] = None):
+        super().__init__(name, help, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+    def samples(self):
+        if self.callback:
+            try:
+                value = self.callback()
+            except Exception as e:
+                logger.error("Error reading gauge %s: %s", self.name, e)
+                return []
+            if isinstance(value, dict):
+                return [
+                    f"{self.name}{_labels(self.labels, key)} {item}"
+                    for key, item in value.items() if item is not None
+                ]
+            return [f"{self.name} {value}"]
+        with self._lock:
+            return [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in self.values.items()]
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts, sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the ``with`` block took, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in self.series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    bucket = _labels(self.labels, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+                bucket = _labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self.metrics.values()) + '\n'
+
+REGISTRY = Registry()
+
+# Stage durations of the check running in the current task, for its log record
+CHECK_STAGES: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar('check_stages', default=None)
+
+class StageHistogram(Histogram):
+    """Histogram of stage durations that also adds each one to ``CHECK_STAGES``."""
+
+    def observe(self, value: float, **labels):
+        super().observe(value, **labels)
+        stages = CHECK_STAGES.get()
+        if stages is not None:
+            stage = labels.get('stage', '')
+            stages[stage] = stages.get(stage, 0.0) + value
+
+# Where a check spends its time: navigate, wait_for_selector, add_to_cart,
+# extract_sizes, screenshot, http_fetch and discord_send
+STAGE_SECONDS = REGISTRY.register(StageHistogram(
+    'stock_check_stage_seconds', 'Time spent in each stage of a stock check', ('stage', 'store')
+))
+CHECK_SECONDS = REGISTRY.register(Histogram(
+    'stock_check_seconds', 'End-to-end duration of one product check', ('store',)
+))
+CHECKS = REGISTRY.register(Counter(
+    'stock_checks_total', 'Completed product checks', ('store', 'outcome')
+))
+ALERTS = REGISTRY.register(Counter(
+    'stock_alert_messages_total', 'Discord messages sent by the notifier', ('outcome',)
+))
+CYCLE_SECONDS = REGISTRY.register(Gauge(
+    'stock_cycle_seconds', 'Time the scheduler took to check every product once'
+))
+ERROR_RATE = REGISTRY.register(Gauge(
+    'stock_check_error_ratio', 'Share of failed checks per store over the last minute', ('store',)
+))
+class CheckRate:
+    """Rolling one-minute window of check outcomes feeding the rate gauges."""
+
+    def __init__(self, window: float = 60.0):
+        self.window = window
+        self.events = deque()  # (time, store, failed)
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        cutoff = now - self.window
+        while self.events and self.events[0][0] < cutoff:
+            self.events.popleft()
+
+    def record(self, store: str, failed: bool):
+        with self._lock:
+            now = time.monotonic()
+            self.events.append((now, store, failed))
+            self._prune(now)
+            checks = failures = 0
+            for _, event_store, event_failed in self.events:
+                if event_store == store:
+                    checks += 1
+                    failures += event_failed
+        ERROR_RATE.set(failures / checks, store=store)
+
+    def per_minute(self) -> float:
+        with self._lock:
+            self._prune(time.monotonic())
+            return len(self.events) * 60.0 / self.window
+
+CHECK_RATE = CheckRate()
+CHECKS_PER_MINUTE = REGISTRY.register(Gauge(
+    'stock_checks_per_minute', 'Checks completed over the last minute', callback=CHECK_RATE.per_minute
+))
+
+def record_check(store: str, outcome: str, seconds: float):
+    """Count one finished check; ``outcome`` is ``ok`` or a failure kind."""
+    CHECKS.inc(store=store, outcome=outcome)
+    CHECK_SECONDS.observe(seconds, store=store)
+    CHECK_RATE.record(store, outcome != 'ok')
+
+class MetricsServer:
+    """Serves ``GET /metrics`` on a local port from the running event loop."""
+
+    def __init__(self, registry: Registry = REGISTRY, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.runner = None
+
+    async def handle(self, request):
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
@@ -1,13 +1,127 @@
-from dataclasses import dataclass
-from typing import List, Optional
+import re
+import sys
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 
-@dataclass
+PRICE_RE = re.compile(r'\d[\d.,\s]*')
+
+# One shared object per distinct set or list of sizes. Most products watch
+# the same few combinations (S/M/L, 36/38/40...), so a large catalogue holds
+# only a handful of these instead of one copy per product.
+_size_sets: Dict[FrozenSet[str], FrozenSet[str]] = {}
+_size_lists: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+def normalize_size(size: str) -> str:
+    return sys.intern(str(size).strip().upper())
+
+def size_set(sizes: Iterable[str]) -> FrozenSet[str]:
+    """Normalized, interned and shared frozenset of sizes."""
+    sizes = frozenset(normalize_size(size) for size in sizes)
+    return _size_sets.setdefault(sizes, sizes)
+
+def size_list(sizes: Iterable[str]) -> Tuple[str, ...]:
+    """Normalized, interned and shared tuple of sizes, first-seen order kept."""
+    sizes = tuple(dict.fromkeys(normalize_size(size) for size in sizes))
+    return _size_lists.setdefault(sizes, sizes)
+
+def parse_price(text) -> Tuple[Optional[float], Optional[str]]:
+    """Split a price such as ``59.95 EUR`` or ``1.299,00 TL`` into amount and currency."""
+    if text is None:
+        return None, None
+    if isinstance(text, (int, float)):
+        return float(text), None
+    match = PRICE_RE.search(text)
+    if not match:
+        return None, None
+    number = re.sub(r'\s', '', match.group()).rstrip('.,')
+    currency = (text[:match.start()] + text[match.end():]).strip() or None
+    if ',' in number and '.' in number:
+        # Whichever separator comes last is the decimal point
+        decimal = ',' if number.rfind(',') > number.rfind('.') else '.'
+        number = number.replace('.' if decimal == ',' else ',', '').replace(decimal, '.')
+    elif ',' in number:
+        head, _, tail = number.rpartition(',')
+        number = f"{head.replace(',', '')}.{tail}" if len(tail) != 3 else number.replace(',', '')
+    elif number.count('.') > 1 or (number.count('.') == 1 and len(number.rpartition('.')[2]) == 3):
+        number = number.replace('.', '')  # thousands separators only
+    try:
+        amount = float(number)
+    except ValueError:
+        return None, None
+    return amount, sys.intern(currency) if currency else None
+
+@dataclass(slots=True, eq=False)
 class Product:
+    """One watched product, kept small so a bot can hold a large catalogue.
+
+    Sizes are normalized once and shared between products, the price is
+    stored as a number and the last check as a ``time.monotonic()`` value;
+    ``price_text`` and ``last_check`` give the display forms.
+    """
     url: str
-    sizes: List[str]
+    sizes: FrozenSet[str]  # union of the sizes every channel watches
     store: str
     name: Optional[str] = None
-    price: Optional[str] = None
-    last_check: Optional[datetime] = None
-    channel_id: Optional[int] = None
\ No newline at end of file
+    price: Optional[float] = None
+    currency: Optional[str] = None
+    checked_at: Optional[float] = None  # time.monotonic() of the last check
+    subscriptions: Dict[int, Tuple[str, ...]] = field(default_factory=dict)  # channel_id -> sizes
+    in_stock: FrozenSet[str] = frozenset()  # sizes in stock at the last check
+    checked_sizes: FrozenSet[str] = frozenset()  # sizes the last check looked at
+    last_screenshot: Optional[str] = None  # digest of the last alert screenshot sent
+
+    def __post_init__(self):
+        self.sizes = size_set(self.sizes)
+        self.store = sys.intern(self.store)
+        if self.price is not None and not isinstance(self.price, float):
+            amount, currency = parse_price(self.price)
+            self.price = amount
+            self.currency = self.currency or currency
+
+    @property
+    def price_text(self) -> Optional[str]:
+        if self.price is None:
+            return None
+        return f"{self.price:.2f} {self.currency}" if self.currency else f"{self.price:.2f}"
+
+    @property
+    def last_check(self) -> Optional[datetime]:
+        """Wall-clock time of the last check, for display and storage."""
+        if self.checked_at is None:
+            return None
+        return datetime.fromtimestamp(time.time() - (time.monotonic() - self.checked_at))
+
+    @last_check.setter
+    def last_check(self, value: Optional[datetime]):
+        self.checked_at = None if value is None else time.monotonic() - (time.time() - value.timestamp())
+
+    @property
+    def availability(self) -> Dict[str, bool]:
+        """Size -> in stock, for every size the last check looked at."""
+        return {size: size in self.in_stock for size in self.checked_sizes}
+
+    @availability.setter
+    def availability(self, value: Dict[str, bool]):
+        self.checked_sizes = size_set(value)
+        self.in_stock = size_set(size for size, in_stock in value.items() if in_stock)
+
+    def in_stock_sizes(self) -> FrozenSet[str]:
+        return self.in_stock
+
+    def mark_checked(self):
+        self.checked_at = time.monotonic()
+
+    def update_availability(self, available_sizes) -> Tuple[List[str], List[str]]:
+        """Store a check result and return (sizes back in stock, sizes sold out).
+
+        A size never seen before counts as out of stock, so it is reported as
+        back in stock the first time it is available.
+        """
+        in_stock = size_set(size for size in size_set(available_sizes) if size in self.sizes)
+        restocked = list(in_stock - self.in_stock)
+        sold_out = list((self.in_stock & self.sizes) - in_stock)
+        self.in_stock = in_stock
+        self.checked_sizes = self.sizes
+        return restocked, sold_out
@@ -2,52 +2,245 @@ import discord
 from discord.ext import commands
 import asyncio
 import logging
+import os
 import random
 import time
-import os
-from datetime import datetime
+from typing import List, Optional, Tuple
+from failures import FAILED, CheckFailed, CircuitBreaker
+from history import HistoryStore
+from importer import WatchEntry, load_config
+from logs import log_check
+from metrics import CHECK_STAGES, CYCLE_SECONDS, REGISTRY, Gauge, record_check
 from models import Product
-from settings import CHECK_INTERVALS
+from notifier import Alert, NotificationDispatcher
+from ratelimit import StoreRateLimiter, Throttled
+from registry import ProductInfoCache, ProductRegistry, normalize_url
+from scheduler import CheckScheduler
+from settings import (
+    CLUSTER_HEARTBEAT, CONFIG_PATH, HISTORY_COMPACT_INTERVAL, HISTORY_FLUSH_INTERVAL, IMPORT_CONCURRENCY,
+    NOTIFY_OUT_OF_STOCK, QUARANTINE_AFTER, SCHEDULE, STORES
+)
 
 logger = logging.getLogger(__name__)
 
 class StockMonitorCog(commands.Cog):
-    def __init__(self, bot, browser):
+    def __init__(self, bot, browser, store, cluster=None):
         self.bot = bot
         self.browser = browser
-        self.products = {}  # channel_id -> List[Product]
+        self.store = store
+        self.cluster = cluster  # a ClusterNode when products are shared with other instances
+        self.cluster_task = None
+        self.cluster_ready = asyncio.Event()
+        self._revisions = {}  # product key -> subscription revision last loaded
+        self.history = HistoryStore(store.path)  # every check result, for !history
+        self.history_task = None
+        self.products = ProductRegistry()  # one entry per product URL
+        self.limiter = StoreRateLimiter()  # request budget per store and host
+        self.info_cache = ProductInfoCache()  # recently loaded product pages
+        self.breaker = CircuitBreaker()  # pauses stores whose checks keep failing
+        self.scheduler = CheckScheduler(limiter=self.limiter, breaker=self.breaker)
+        self.quarantined = {}  # product key -> why it is no longer checked
+        self.checks = set()  # running check tasks
+        self.notifier = NotificationDispatcher(bot)
         self.monitoring_task = None
+        self._cycle_started = time.monotonic()
+        self._cycle_seen = set()
+        self.register_metrics()
+        self.load_products()
         self.start_monitoring()
         
+    def register_metrics(self):
+        """Expose queue depths and browser health as scrape-time gauges."""
+        pool = self.browser.pool
+        gauges = [
+            Gauge('stock_products', 'Unique products being monitored', callback=lambda: len(self.products)),
+            Gauge('stock_checks_overdue', 'Products past due waiting for a browser', callback=self.scheduler.overdue),
+            Gauge('stock_checks_running', 'Checks in progress', callback=lambda: len(self.checks)),
+            Gauge('stock_alert_queue_depth', 'Alerts waiting to be sent', callback=lambda: self.notifier.depth),
+            Gauge('store_request_rate', 'Requests per second currently allowed per store and host', ('store', 'host'),
+                  callback=self.limiter.rates),
+            Gauge('store_checks_paused', 'Stores whose checks are paused after repeated failures', ('store',),
+                  callback=self.breaker.states),
+            Gauge('stock_products_quarantined', 'Products no longer checked because their page is gone',
+                  callback=lambda: len(self.quarantined)),
+            Gauge('browser_drivers_in_use', 'Pooled drivers checked out', callback=lambda: pool.in_use),
+            Gauge('stock_products_owned', 'Products this instance checks', callback=lambda: len(self.scheduler)),
+            Gauge('browser_driver_events', 'Driver launches, restarts and recycles', ('event',),
+                  callback=lambda: {(event,): count for event, count in pool.stats.items()}),
+            Gauge('browser_driver_rss_bytes', 'Memory used by each driver\'s Chrome processes', ('driver',),
+                  callback=lambda: {(str(number),): rss for number, rss in pool.memory().items()})
+        ]
+        for gauge in gauges:
+            REGISTRY.register(gauge)
+        
+    def load_products(self):
+        """Resume monitoring everything saved by a previous run."""
+        self.quarantined = self.store.quarantined()
+        for product in self.store.load(self.products):
+            # Spread the first checks out instead of hitting every page at once
+            self._schedule(normalize_url(product.url), product.store, delay=random.uniform(0, SCHEDULE['base']))
+        self._revisions = self.store.revisions()
+        
+    def _schedule(self, key: str, store: str, delay: float = 0.0):
+        """Schedule a product's checks, unless another instance owns it or it is quarantined."""
+        if key in self.quarantined:
+            return
+        if self.cluster is None or self.cluster.owns(key):
+            self.scheduler.add(key, store, delay=delay)
+            
+    def handles_channel(self, channel_id: int) -> bool:
+        """Whether this instance answers commands and imports for a channel."""
+        return self.cluster is None or self.cluster.handles(f"channel:{channel_id}")
+        
     def start_monitoring(self):
         """Start the monitoring loop if not already running."""
-        if not self.monitoring_task:
+        self.notifier.start()
+        if not self.monitoring_task or self.monitoring_task.done():
             self.monitoring_task = asyncio.create_task(self.monitor_stock())
             logger.info("Started stock monitoring task")
+        if self.cluster and not self.cluster_task:
+            self.cluster_task = asyncio.create_task(self.sync_cluster())
+        if not self.history_task:
+            self.history_task = asyncio.create_task(self.maintain_history())
+            
+    async def maintain_history(self):
+        """Write buffered history samples regularly and downsample old ones."""
+        last_compact = time.monotonic()
+        while True:
+            await asyncio.sleep(HISTORY_FLUSH_INTERVAL)
+            try:
+                self.history.flush()
+                if time.monotonic() - last_compact < HISTORY_COMPACT_INTERVAL:
+                    continue
+                last_compact = time.monotonic()
+                dropped = 0
+                for key in self.history.keys():
+                    if self.cluster is None or self.cluster.owns(key):
+                        dropped += self.history.compact(key)
+                    await asyncio.sleep(0)  # one product at a time between other work
+                logger.info("Compacted availability history, %s samples merged or expired", dropped)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error maintaining history: %s", e)
+            
+    async def sync_cluster(self):
+        """Follow the other instances: their product changes and the split of products.
+
+        Every ``CLUSTER_HEARTBEAT`` seconds this picks up products that other
+        instances added, removed or re-subscribed in the shared database,
+        renews this instance's lease and takes over or hands off products as
+        nodes join and leave.
+        """
+        while True:
+            try:
+                revisions = self.store.revisions()
+                for key in set(self.products.products) - set(revisions):
+                    self.products.drop(key)
+                    self.scheduler.remove(key)
+                changed = [key for key, revision in revisions.items() if self._revisions.get(key) != revision]
+                self.store.reload(self.products, changed)
+                self._revisions = revisions
+                quarantined, released = self.store.quarantined(), self.quarantined
+                self.quarantined = quarantined
+                for key in quarantined:
+                    self.scheduler.remove(key)
+                for key in set(released) - set(quarantined):
+                    # Added again on another instance
+                    product = self.products.products.get(key)
+                    if product:
+                        self._schedule(key, product.store)
+
+                gained, lost = await asyncio.to_thread(self.cluster.rebalance, list(revisions))
+                for key in lost:
+                    self.scheduler.remove(key)
+                for key in gained:
+                    product = self.products.products.get(key)
+                    if product:
+                        # Continue from the last check its previous owner saved
+                        self.store.refresh(product)
+                        self._schedule(key, product.store, delay=random.uniform(0, SCHEDULE['fast']))
+                if gained or lost:
+                    logger.info(
+                        "Node %s took over %s and handed off %s products; it now checks %s",
+                        self.cluster.node, len(gained), len(lost), len(self.scheduler)
+                    )
+                self.cluster_ready.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error syncing with the cluster: %s", e)
+            await asyncio.sleep(CLUSTER_HEARTBEAT)
             
+    async def _fetch_product(self, store: str, url: str, sizes) -> Tuple[Optional[Product], Optional[dict]]:
+        """Build a product for a URL nobody is watching yet.
+
+        Returns the product and the ``{SIZE: in_stock}`` map its page showed
+        (``None`` if unknown). Name and price read in the last
+        ``PRODUCT_INFO_TTL`` seconds are reused without loading the page
+        again; availability is not, so such a product gets a real first check.
+        """
+        product_info = self.info_cache.get(url)
+        page_sizes = checked_at = None
+        if not product_info:
+            await self.limiter.acquire(store, url)
+            product_info = await self.browser.get_product_info(store, url)
+            if not product_info:
+                return None, None
+            page_sizes, checked_at = product_info.get('sizes'), time.monotonic()
+            self._cache_info(url, product_info)
+        product = Product(
+            store=store,
+            url=url,
+            name=product_info.get('name', 'Unknown Product'),
+            price=product_info.get('price'),
+            sizes=sizes,
+            checked_at=checked_at
+        )
+        return product, page_sizes
+
+    def _cache_info(self, url: str, info: dict):
+        """Remember a product's name and price; its sizes go stale too quickly."""
+        self.info_cache.put(url, {'name': info.get('name'), 'price': info.get('price'), 'url': url})
+        
+    def _subscribe(self, product: Product, channel_id: int, sizes, page_sizes: Optional[dict] = None) -> Product:
+        """Subscribe a channel, save it and make sure the product is scheduled.
+
+        ``page_sizes`` from the page load that added the product count as its
+        first check when they cover every watched size; otherwise a new
+        product is checked right away.
+        """
+        key = normalize_url(product.url)
+        is_new = key not in self.products.products
+        product = self.products.subscribe(product, channel_id, sizes)
+        self.store.save_subscription(product, channel_id)
+        if self.quarantined.pop(key, None):
+            # Added again: give the page another chance
+            self.store.quarantine(product, None)
+        if is_new and page_sizes and all(size in page_sizes for size in product.sizes):
+            product.update_availability([size for size in product.sizes if page_sizes.get(size)])
+            self.store.record_check(product)
+            self.history.record(key, product.in_stock, product.price)
+            self._schedule(key, product.store, delay=SCHEDULE['fast'])
+        else:
+            self._schedule(key, product.store)
+        return product
+        
     async def add_product(self, ctx, store: str, url: str, *sizes):
         """Add a product to monitor."""
         try:
-            # Initialize product info
-            product_info = await self.browser.get_product_info(store, url)
-            if not product_info:
-                await ctx.send("Error: Could not fetch product information. Please check the URL.")
-                return
-                
-            product = Product(
-                store=store,
-                url=url,
-                name=product_info.get('name', 'Unknown Product'),
-                price=product_info.get('price'),
-                sizes=list(sizes),
-                last_check=datetime.now()
-            )
-            
-            # Add to products dict
             channel_id = ctx.channel.id
-            if channel_id not in self.products:
-                self.products[channel_id] = []
-            self.products[channel_id].append(product)
+            product = self.products.get(url)
+            
+            # Only load the page for URLs nobody is watching yet
+            page_sizes = None
+            if not product:
+                product, page_sizes = await self._fetch_product(store, url, sizes)
+                if not product:
+                    await ctx.send("Error: Could not fetch product information. Please check the URL.")
+                    return
+                    
+            product = self._subscribe(product, channel_id, sizes, page_sizes)
             
             # Send confirmation
             embed = discord.Embed(
@@ -57,22 +250,98 @@ class StockMonitorCog(commands.Cog):
             )
             embed.add_field(name="Sizes", value=", ".join(sizes))
             embed.add_field(name="Store", value=store.capitalize())
-            if product.price:
-                embed.add_field(name="Price", value=product.price)
+            if product.price is not None:
+                embed.add_field(name="Price", value=product.price_text)
+            watched = [size.upper() for size in sizes]
+            if all(size in product.checked_sizes for size in watched):
+                in_stock = [size for size in watched if size in product.in_stock]
+                embed.add_field(name="In Stock Now", value=", ".join(in_stock) or "None of your sizes")
                 
             await ctx.send(embed=embed)
             
             # Start monitoring if not already running
             self.start_monitoring()
             
+        except Throttled as e:
+            self.limiter.throttled(store, url, e.retry_after)
+            await ctx.send(f"{store.capitalize()} is limiting requests right now, please try again in a few minutes.")
         except Exception as e:
-            logger.error(f"Error adding product: {str(e)}")
+            logger.error("Error adding product: %s", e)
             await ctx.send(f"Error adding product: {str(e)}")
             
+    async def import_products(self, channel_id: int, entries: List[WatchEntry], progress=None) -> dict:
+        """Subscribe a channel to many products at once.
+
+        Pages of new products are loaded concurrently, up to
+        ``IMPORT_CONCURRENCY`` at a time and within each store's request
+        budget, so stores load in parallel. ``progress(done, total)`` is
+        awaited after each entry. Returns counts of ``added`` and
+        ``existing`` products and a list of ``failed`` entry messages.
+        """
+        results = {'added': 0, 'existing': 0, 'failed': []}
+        limit = asyncio.Semaphore(IMPORT_CONCURRENCY)
+        done = 0
+        
+        async def add(entry):
+            nonlocal done
+            try:
+                product = self.products.get(entry.url)
+                if product:
+                    results['existing'] += 1
+                    page_sizes = None
+                else:
+                    async with limit:
+                        product, page_sizes = await self._fetch_product(entry.store, entry.url, entry.sizes)
+                    if not product:
+                        results['failed'].append(f"{entry.url}: could not read the product page")
+                        return
+                    results['added'] += 1
+                self._subscribe(product, channel_id, entry.sizes, page_sizes)
+            except Throttled as e:
+                self.limiter.throttled(entry.store, entry.url, e.retry_after)
+                results['failed'].append(f"{entry.url}: {STORES[entry.store]} is limiting requests")
+            except Exception as e:
+                logger.error("Error importing %s: %s", entry.url, e)
+                results['failed'].append(f"{entry.url}: {str(e)}")
+            finally:
+                done += 1
+                if progress:
+                    await progress(done, len(entries))
+                    
+        await asyncio.gather(*(add(entry) for entry in entries))
+        self.start_monitoring()
+        logger.info(
+            "Imported %s products into channel %s: %s added, %s already watched, %s failed",
+            len(entries), channel_id, results['added'], results['existing'], len(results['failed'])
+        )
+        return results
+        
+    async def import_config(self, path: str = CONFIG_PATH):
+        """Add the products listed in ``config.json`` to its ``channel_id``."""
+        if not os.path.exists(path):
+            return
+        try:
+            entries, problems, channel_id = load_config(path)
+        except (OSError, ValueError) as e:
+            logger.error("Could not read %s: %s", path, e)
+            return
+        for problem in problems:
+            logger.warning("%s: %s", path, problem)
+        if not entries:
+            return
+        if not channel_id:
+            logger.info("%s lists %s products but no channel_id; not importing them", path, len(entries))
+            return
+        if self.cluster:
+            await self.cluster_ready.wait()
+        if not self.handles_channel(int(channel_id)):
+            return
+        await self.import_products(int(channel_id), entries)
+        
     async def list_products(self, ctx):
         """List all monitored products in the channel."""
         channel_id = ctx.channel.id
-        products = self.products.get(channel_id, [])
+        products = self.products.channel_products(channel_id)
         
         if not products:
             await ctx.send("No products being monitored in this channel.")
@@ -83,12 +352,15 @@ class StockMonitorCog(commands.Cog):
             color=0x3498db
         )
         
-        for i, product in enumerate(products, 1):
-            value = f"Sizes: {', '.join(product.sizes)}\n"
-            if product.price:
-                value += f"Price: {product.price}\n"
+        for i, (product, sizes) in enumerate(products, 1):
+            value = f"Sizes: {', '.join(sizes)}\n"
+            if product.price is not None:
+                value += f"Price: {product.price_text}\n"
             if product.last_check:
                 value += f"Last checked: {product.last_check.strftime('%Y-%m-%d %H:%M:%S')}"
+            reason = self.quarantined.get(normalize_url(product.url))
+            if reason:
+                value = f"{value.rstrip()}\n⚠️ No longer checked: {reason}"
                 
             embed.add_field(
                 name=f"{i}. {product.name}",
@@ -101,7 +373,7 @@ class StockMonitorCog(commands.Cog):
     async def remove_product(self, ctx, index: int = None):
         """Remove a product from monitoring."""
         channel_id = ctx.channel.id
-        products = self.products.get(channel_id, [])
+        products = self.products.channel_products(channel_id)
         
         if not products:
             await ctx.send("No products being monitored in this channel.")
@@ -117,10 +389,17 @@ class StockMonitorCog(commands.Cog):
                 await ctx.send(f"Invalid product number. Please use a number between 1 and {len(products)}")
                 return
                 
-            removed_product = products.pop(index - 1)
-            
-            if not products:
-                del self.products[channel_id]
+            removed_product = self.products.unsubscribe(channel_id, index - 1)
+            self.store.delete_subscription(removed_product, channel_id)
+            if not removed_product.subscriptions:
+                self.scheduler.remove(normalize_url(removed_product.url))
+                self.quarantined.pop(normalize_url(removed_product.url), None)
+                self.history.forget(normalize_url(removed_product.url))
+                # Adding it back soon needs no page load
+                self._cache_info(removed_product.url, {
+                    'name': removed_product.name,
+                    'price': removed_product.price_text
+                })
                 
             embed = discord.Embed(
                 title="❌ Product Removed",
@@ -132,68 +411,240 @@ class StockMonitorCog(commands.Cog):
         except ValueError:
             await ctx.send("Please provide a valid number")
         except Exception as e:
-            logger.error(f"Error removing product: {str(e)}")
+            logger.error("Error removing product: %s", e)
             await ctx.send(f"Error removing product: {str(e)}")
-        
+
+    async def show_history(self, ctx, index: int = None):
+        """Show when a product's sizes came back in stock and how its price changed."""
+        products = self.products.channel_products(ctx.channel.id)
+
+        if not products:
+            await ctx.send("No products being monitored in this channel.")
+            return
+
+        if index is None or index < 1 or index > len(products):
+            await ctx.send(f"Please give a product number between 1 and {len(products)} (use !list to see numbers)")
+            return
+
+        product, sizes = products[index - 1]
+        timeline = self.history.timeline(normalize_url(product.url), sizes)
+        if not timeline.samples:
+            await ctx.send(f"No checks recorded for {product.name} yet.")
+            return
+
+        when = lambda moment: moment.strftime('%b %d %H:%M')
+        embed = discord.Embed(
+            title=f"📈 History: {product.name}",
+            description=f"{timeline.samples} checks from {when(timeline.first)} to {when(timeline.last)}",
+            color=0x3498db
+        )
+        for size in sizes:
+            periods = timeline.restocks.get(size, [])
+            lines = [
+                f"{when(start)} → {when(end) if end else 'still in stock'}"
+                for start, end in periods[-8:]
+            ]
+            if len(periods) > 8:
+                lines.insert(0, f"...{len(periods) - 8} earlier restocks")
+            embed.add_field(name=f"Size {size}", value="\n".join(lines) or "Not in stock at any check", inline=False)
+
+        if timeline.prices:
+            currency = f" {product.currency}" if product.currency else ""
+            lines = [f"{when(moment)}: {price:.2f}{currency}" for moment, price in timeline.prices[-10:]]
+            embed.add_field(name="Price", value="\n".join(lines), inline=False)
+        embed.add_field(name="Product Link", value=product.url, inline=False)
+        await ctx.send(embed=embed)
+
+    async def check_product(self, product):
+        """Check one product and announce size changes to the channels watching them.
+
+        Alerts are edge-triggered: a channel hears about a size when it comes
+        back in stock, not on every check while it stays available. They are
+        handed to the notifier, so the check never waits on Discord. A
+        failed check is retried later and later (see ``_check_failed``).
+        """
+        started = time.perf_counter()
+        outcome = FAILED
+        failure = None
+        stages = {}  # filled in by STAGE_SECONDS, also on the browser threads
+        token = CHECK_STAGES.set(stages)
+        try:
+            try:
+                available_sizes, screenshot = await self.browser.check_stock(product)
+            except Throttled as e:
+                # Back off this store; other stores keep their pace
+                self.limiter.throttled(product.store, product.url, e.retry_after)
+                outcome = 'throttled'
+                failure = CheckFailed(outcome, str(e))
+                return
+            except CheckFailed as e:
+                # Keep the last known state
+                outcome, failure = e.kind, e
+                return
+            outcome = 'ok'
+            self.limiter.succeeded(product.store, product.url)
+            if self.cluster and not self.cluster.owns(normalize_url(product.url)):
+                # Handed to another instance mid-check; the new owner reports it
+                return
+            if normalize_url(product.url) not in self.products.products:
+                # Removed mid-check; its history is already forgotten
+                return
+                
+            product.mark_checked()
+            restocked, sold_out = product.update_availability(available_sizes)
+            self.store.record_check(product)
+            self.history.record(normalize_url(product.url), product.in_stock, product.price)
+            
+            if screenshot and screenshot.digest == product.last_screenshot:
+                # Same picture as the last alert; don't upload it again
+                screenshot = None
+            
+            for channel_id, sizes in self.products.fan_out(product, restocked).items():
+                embed = discord.Embed(
+                    title="🛍 Stock Alert!",
+                    description=f"{product.name} is available in sizes: {', '.join(sizes)}",
+                    color=0x2ecc71
+                )
+                
+                if product.price is not None:
+                    embed.add_field(name="Price", value=product.price_text)
+                    
+                embed.add_field(name="Last Checked", value=product.last_check.strftime("%Y-%m-%d %H:%M:%S"))
+                embed.add_field(name="Product Link", value=product.url)
+                
+                if screenshot:
+                    embed.set_image(url=f"attachment://{screenshot.filename}")
+                self.notifier.submit(Alert(channel_id, embed, screenshot))
+                
+            if restocked and screenshot:
+                product.last_screenshot = screenshot.digest
+                
+            if NOTIFY_OUT_OF_STOCK:
+                for channel_id, sizes in self.products.fan_out(product, sold_out).items():
+                    embed = discord.Embed(
+                        title="🚫 Sold Out",
+                        description=f"{product.name} is no longer available in sizes: {', '.join(sizes)}",
+                        color=0xe67e22
+                    )
+                    embed.add_field(name="Product Link", value=product.url)
+                    self.notifier.submit(Alert(channel_id, embed))
+                    
+        except Exception as e:
+            logger.error("Error checking product %s: %s", product.name, e)
+            failure = failure or CheckFailed(FAILED, str(e))
+        finally:
+            CHECK_STAGES.reset(token)
+            seconds = time.perf_counter() - started
+            record_check(product.store, outcome, seconds)
+            log_check({
+                'product': normalize_url(product.url),
+                'store': product.store,
+                'outcome': outcome,
+                'ms': round(seconds * 1000, 1),
+                'stages': {stage: round(spent * 1000, 1) for stage, spent in stages.items()}
+            })
+            self._cycle_progress(normalize_url(product.url))
+            self.breaker.record(product.store, normalize_url(product.url), outcome)
+            if outcome == 'ok':
+                self.scheduler.record(normalize_url(product.url), product.in_stock_sizes())
+            else:
+                self._check_failed(product, failure or CheckFailed(outcome))
+
+    def _check_failed(self, product, failure: CheckFailed):
+        """Back off a product after a failed check, and quarantine dead pages.
+
+        A product whose checks keep failing the same permanent way (see
+        ``QUARANTINE_AFTER``) is no longer checked, and the channels watching
+        it are told so.
+        """
+        key = normalize_url(product.url)
+        streak = self.scheduler.failed(key, failure.kind)
+        if failure.kind != 'throttled':
+            # Throttling is already reported by the rate limiter
+            logger.warning("Check of %s failed (%s in a row): %s", product.url, streak, failure)
+        limit = QUARANTINE_AFTER.get(failure.kind)
+        if limit and streak >= limit:
+            self.quarantine(product, f"{failure.detail or failure.kind} on {streak} checks in a row")
+
+    def quarantine(self, product, reason: str):
+        """Stop checking a product and tell the channels watching it why."""
+        key = normalize_url(product.url)
+        self.scheduler.remove(key)
+        self.quarantined[key] = reason
+        self.store.quarantine(product, reason)
+        logger.warning("Quarantined %s: %s", product.url, reason)
+        for channel_id in product.subscriptions:
+            embed = discord.Embed(
+                title="⚠️ Product Unavailable",
+                description=f"{product.name} is no longer checked: {reason}.",
+                color=0x95a5a6
+            )
+            embed.add_field(
+                name="What Now",
+                value="Use !monitor with the same link to check it again, or !remove to stop watching it.",
+                inline=False
+            )
+            embed.add_field(name="Product Link", value=product.url, inline=False)
+            self.notifier.submit(Alert(channel_id, embed))
+            
+    def _cycle_progress(self, key):
+        """Publish how long it took until every scheduled product had been checked once.
+
+        Only products this instance checks count, not the ones other
+        instances own.
+        """
+        if key not in self.scheduler:
+            return
+        self._cycle_seen.add(key)
+        if len(self._cycle_seen) >= len(self.scheduler):
+            # Forget products that stopped being scheduled during the cycle
+            self._cycle_seen.intersection_update(self.scheduler.entries)
+        if len(self._cycle_seen) >= len(self.scheduler):
+            CYCLE_SECONDS.set(time.monotonic() - self._cycle_started)
+            self._cycle_seen = set()
+            self._cycle_started = time.monotonic()
+            
+    async def _check_slot(self, limit, product):
+        """Run one check, then free its slot for the next due product."""
+        try:
+            await self.check_product(product)
+        finally:
+            limit.release()
+            
     async def monitor_stock(self):
-        """Main monitoring loop."""
+        """Main monitoring loop: start each product's check as it falls due."""
+        # One check per browser in the pool at a time
+        limit = asyncio.Semaphore(self.browser.concurrency)
         try:
-            while any(self.products.values()):  # While there are products to monitor
-                for channel_id, products in self.products.items():
-                    channel = self.bot.get_channel(channel_id)
-                    if not channel:
-                        logger.error(f"Could not find channel {channel_id}")
-                        continue
-                        
-                    for product in products:
-                        try:
-                            available_sizes, screenshot_path = await self.browser.check_stock(product)
-                            product.last_check = datetime.now()
-                            
-                            if available_sizes:
-                                embed = discord.Embed(
-                                    title="🛍 Stock Alert!",
-                                    description=f"{product.name} is available in sizes: {', '.join(available_sizes)}",
-                                    color=0x2ecc71
-                                )
-                                
-                                if product.price:
-                                    embed.add_field(name="Price", value=product.price)
-                                    
-                                embed.add_field(name="Last Checked", value=product.last_check.strftime("%Y-%m-%d %H:%M:%S"))
-                                embed.add_field(name="Product Link", value=product.url)
-                                
-                                # Send message with screenshot if available
-                                if screenshot_path:
-                                    file = discord.File(screenshot_path)
-                                    await channel.send(embed=embed, file=file)
-                                    # Clean up screenshot
-                                    try:
-                                        if os.path.exists(screenshot_path):
-                                            os.remove(screenshot_path)
-                                    except Exception as e:
-                                        logger.error(f"Error removing screenshot: {str(e)}")
-                                else:
-                                    await channel.send(embed=embed)
-                                    
-                        except Exception as e:
-                            logger.error(f"Error checking product {product.name}: {str(e)}")
-                            continue
-                            
-                        # Random delay between product checks
-                        await asyncio.sleep(random.uniform(2, 5))
-                        
-                # Random delay between full cycles
-                delay = random.uniform(CHECK_INTERVALS['min'], CHECK_INTERVALS['max'])
-                await asyncio.sleep(delay)
+            while True:
+                await limit.acquire()
+                key = await self.scheduler.next_due()
+                product = self.products.products.get(key)
+                if not product:
+                    limit.release()
+                    continue
+                    
+                task = asyncio.create_task(self._check_slot(limit, product))
+                self.checks.add(task)
+                task.add_done_callback(self.checks.discard)
                 
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"Error in monitor_stock: {str(e)}")
+            logger.error("Error in monitor_stock: %s", e)
         finally:
             self.monitoring_task = None
             
-    def cog_unload(self):
+    async def cog_unload(self):
         """Clean up resources when cog is unloaded."""
         if self.monitoring_task:
             self.monitoring_task.cancel()
-        self.browser.close()
\ No newline at end of file
+        if self.cluster_task:
+            self.cluster_task.cancel()
+        if self.history_task:
+            self.history_task.cancel()
+        self.history.close()
+        for task in list(self.checks):
+            task.cancel()
+        self.notifier.stop()
+        await self.browser.aclose()
\ No newline at end of file
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import discord
+from metrics import ALERTS, STAGE_SECONDS
+from ratelimit import TokenBucket
+from screenshots import Screenshot
+from settings import ALERT_BATCH_WINDOW, ALERT_RATE_LIMIT, ALERT_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Discord accepts at most this many embeds, and attachments, per message
+MAX_EMBEDS = 10
+
+@dataclass
+class Alert:
+    channel_id: int
+    embed: discord.Embed
+    screenshot: Optional[Screenshot] = None
+
+class NotificationDispatcher:
+    """Sends alerts from a queue so checks never wait on Discord.
+
+    ``submit`` only enqueues. Alerts for the same channel that arrive within
+    ``ALERT_BATCH_WINDOW`` seconds of each other go out together, as one
+    message carrying up to ten embeds and their screenshots. Every channel
+    is its own message route with a token bucket sized to Discord's
+    per-channel limit, and a 429 pauses just that route.
+    """
+
+    def __init__(self, bot, window: float = ALERT_BATCH_WINDOW, workers: int = ALERT_WORKERS,
+                 rate_limit: dict = ALERT_RATE_LIMIT):
+        self.bot = bot
+        self.window = window
+        self.workers = workers
+        self.rate_limit = rate_limit
+        self.queue = asyncio.Queue()  # incoming alerts
+        self.ready = asyncio.Queue()  # channel ids whose batch window closed
+        self.pending: Dict[int, List[Alert]] = {}
+        self.buckets: Dict[int, TokenBucket] = {}
+        self.locks: Dict[int, asyncio.Lock] = {}
+        self.tasks = []
+
+    def start(self):
+        if self.tasks:
+            return
+        self.tasks.append(asyncio.create_task(self._collect()))
+        for _ in range(self.workers):
+            self.tasks.append(asyncio.create_task(self._work()))
+
+    def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+    def submit(self, alert: Alert):
+        """Queue an alert for delivery. Never blocks."""
+        self.queue.put_nowait(alert)
+
+    @property
+    def depth(self) -> int:
+        """Alerts queued or waiting in a batch window."""
+        return self.queue.qsize() + sum(len(alerts) for alerts in self.pending.values())
+
+    async def _collect(self):
+        """Group incoming alerts per channel and close each batch after the window."""
+        loop = asyncio.get_running_loop()
+        while True:
+            alert = await self.queue.get()
+            batch = self.pending.setdefault(alert.channel_id, [])
+            if not batch:
+                loop.call_later(self.window, self.ready.put_nowait, alert.channel_id)
+            batch.append(alert)
+
+    async def _work(self):
+        while True:
+            channel_id = await self.ready.get()
+            alerts = self.pending.pop(channel_id, [])
+            if not alerts:
+                continue
+            # Keep messages to one channel in order across workers
+            async with self.locks.setdefault(channel_id, asyncio.Lock()):
+                for start in range(0, len(alerts), MAX_EMBEDS):
+                    try:
+                        await self._send(channel_id, alerts[start:start + MAX_EMBEDS])
+                    except Exception as e:
+                        logger.error("Error sending alerts to channel %s: %s", channel_id, e)
+
+    def _bucket(self, channel_id: int) -> TokenBucket:
+        bucket = self.buckets.get(channel_id)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_limit['rate'], self.rate_limit['burst'])
+            self.buckets[channel_id] = bucket
+        return bucket
+
+    async def _send(self, channel_id: int, alerts: List[Alert]):
+        """Send one message with the embeds and screenshots of ``alerts``."""
+        channel = self.bot.get_channel(channel_id)
+        if not channel:
+            logger.error("Could not find channel %s", channel_id)
+            return
+
+        embeds = [alert.embed for alert in alerts]
+        screenshots = {}
+        for alert in alerts:
+            if alert.screenshot:
+                screenshots.setdefault(alert.screenshot.filename, alert.screenshot)
+
+        bucket = self._bucket(channel_id)
+        for attempt in range(2):
+            await bucket.acquire()
+            try:
+                # Fresh File objects per attempt; a send consumes their streams
+                files = [screenshot.to_file() for screenshot in screenshots.values()]
+                with STAGE_SECONDS.time(stage='discord_send', store=''):
+                    await channel.send(embeds=embeds, files=files)
+                ALERTS.inc(outcome='sent')
+                return
+            except discord.HTTPException as e:
+                ALERTS.inc(outcome='rate_limited' if e.status == 429 else 'failed')
+                if e.status != 429 or attempt:
+                    raise
+                retry_after = getattr(e, 'retry_after', None) or 5
+                logger.warning("Rate limited on channel %s, retrying in %.1fs", channel_id, retry_after)
+                bucket.pause(retry_after)
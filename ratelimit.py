@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from settings import STORE_RATE_LIMITS
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        """Wait for a token and take it. Waiters are served in order."""
+        async with self._lock:
+            while True:
+                wait = self.delay()
+                if wait <= 0:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Empty the bucket so the next token arrives after ``seconds``."""
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+class Throttled(Exception):
+    """A store answered with a block or rate-limit response."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(status, retry_after)
+        self.status = status
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return f"store responded with HTTP {self.status}"
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket whose rate backs off when throttled and creeps back after.
+
+    Additive increase, multiplicative decrease: ``throttled`` multiplies the
+    rate by ``decrease`` (not below ``min_rate``) and pauses the bucket, and
+    every ``succeeded`` adds ``recover`` back, up to the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float, decrease: float, recover: float):
+        super().__init__(rate, burst)
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.decrease = decrease
+        self.recover = recover
+
+    def reserve(self) -> float:
+        """Take a token if one is available now, else return the seconds to wait."""
+        wait = self.delay()
+        if wait <= 0:
+            self.tokens -= 1
+        return wait
+
+    def throttled(self, retry_after: Optional[float] = None):
+        self._refill()
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.pause(retry_after or 1 / self.rate)
+
+    def succeeded(self):
+        self._refill()
+        self.rate = min(self.max_rate, self.rate + self.recover)
+
+class StoreRateLimiter:
+    """Politeness limits per store and host, so stores never wait on each other.
+
+    Each (store, host) pair has its own ``AdaptiveTokenBucket`` configured
+    from ``STORE_RATE_LIMITS``; ``url`` may be any URL on the host.
+    """
+
+    def __init__(self, limits: dict = STORE_RATE_LIMITS):
+        self.limits = limits
+        self.buckets: Dict[Tuple[str, str], AdaptiveTokenBucket] = {}
+
+    def bucket(self, store: str, url: str) -> AdaptiveTokenBucket:
+        key = (store, urlsplit(url).hostname or '')
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            limit = self.limits.get(store, self.limits['default'])
+            bucket = self.buckets[key] = AdaptiveTokenBucket(**limit)
+        return bucket
+
+    def reserve(self, store: str, url: str) -> float:
+        return self.bucket(store, url).reserve()
+
+    async def acquire(self, store: str, url: str):
+        await self.bucket(store, url).acquire()
+
+    def throttled(self, store: str, url: str, retry_after: Optional[float] = None):
+        bucket = self.bucket(store, url)
+        bucket.throttled(retry_after)
+        logger.warning("%s is throttling %s, slowing to %.2f requests/s", store, urlsplit(url).hostname, bucket.rate)
+
+    def succeeded(self, store: str, url: str):
+        self.bucket(store, url).succeeded()
+
+    def rates(self) -> Dict[Tuple[str, str], float]:
+        """Current requests per second allowed for each (store, host)."""
+        return {key: bucket.rate for key, bucket in self.buckets.items()}
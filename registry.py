@@ -0,0 +1,164 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from models import Product, size_list, size_set
+from settings import PRODUCT_INFO_CACHE_SIZE, PRODUCT_INFO_TTL, TRACKING_PARAM_PREFIXES, TRACKING_PARAMS
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+def normalize_url(url: str) -> str:
+    """Reduce a product URL to one canonical form for deduplication.
+
+    Scheme and host are lower-cased, the trailing slash, fragment and
+    tracking parameters dropped and the remaining query sorted.
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip('/') or '/'
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    query = urlencode(sorted(param for param in params if not _is_tracking_param(param[0])))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+def _merge_sizes(*size_lists) -> Tuple[str, ...]:
+    """Upper-cased union of size lists, keeping first-seen order."""
+    return size_list(size for sizes in size_lists for size in sizes)
+
+class ProductRegistry:
+    """Every watched product, stored once per normalized URL.
+
+    Each ``Product`` keeps a ``subscriptions`` map of channel id to the sizes
+    that channel asked for, and its ``sizes`` is the union of those, so one
+    check per product covers every subscriber. Channels also keep their own
+    add order so ``!list`` and ``!remove`` numbering stays stable.
+    """
+
+    def __init__(self):
+        self.products: Dict[str, Product] = {}  # normalized URL -> Product
+        self.channels: Dict[int, List[str]] = {}  # channel_id -> normalized URLs
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def __iter__(self) -> Iterator[Product]:
+        return iter(list(self.products.values()))
+
+    def get(self, url: str) -> Optional[Product]:
+        return self.products.get(normalize_url(url))
+
+    def subscribe(self, product: Product, channel_id: int, sizes) -> Product:
+        """Subscribe a channel to a product and return the shared record.
+
+        ``product`` is only stored when its URL is not watched yet; otherwise
+        the existing record gains the channel's sizes.
+        """
+        key = normalize_url(product.url)
+        existing = self.products.setdefault(key, product)
+        channel_sizes = existing.subscriptions.get(channel_id, ())
+        existing.subscriptions[channel_id] = _merge_sizes(channel_sizes, sizes)
+        existing.sizes = size_set(_merge_sizes(*existing.subscriptions.values()))
+
+        urls = self.channels.setdefault(channel_id, [])
+        if key not in urls:
+            urls.append(key)
+        return existing
+
+    def unsubscribe(self, channel_id: int, index: int) -> Optional[Product]:
+        """Drop the channel's ``index``-th (0-based) product subscription."""
+        urls = self.channels.get(channel_id, [])
+        if index < 0 or index >= len(urls):
+            return None
+        key = urls.pop(index)
+        if not urls:
+            del self.channels[channel_id]
+
+        product = self.products[key]
+        product.subscriptions.pop(channel_id, None)
+        if product.subscriptions:
+            product.sizes = size_set(_merge_sizes(*product.subscriptions.values()))
+        else:
+            del self.products[key]
+        return product
+
+    def drop(self, key: str) -> Optional[Product]:
+        """Forget a product and every channel's subscription to it."""
+        product = self.products.pop(key, None)
+        if product:
+            for channel_id in product.subscriptions:
+                urls = self.channels.get(channel_id, [])
+                if key in urls:
+                    urls.remove(key)
+                if not urls:
+                    self.channels.pop(channel_id, None)
+        return product
+
+    def resubscribe(self, product: Product, subscriptions: Dict[int, List[str]]) -> Optional[Product]:
+        """Make the channels watching a product exactly ``subscriptions``.
+
+        Used when another bot instance changed them. The stored record is
+        kept if there is one, and channels that still watch the product keep
+        their numbering.
+        """
+        key = normalize_url(product.url)
+        if not subscriptions:
+            self.drop(key)
+            return None
+        existing = self.products.setdefault(key, product)
+        for channel_id in set(existing.subscriptions) - set(subscriptions):
+            urls = self.channels.get(channel_id, [])
+            if key in urls:
+                urls.remove(key)
+            if not urls:
+                self.channels.pop(channel_id, None)
+        existing.subscriptions = {}
+        for channel_id, sizes in subscriptions.items():
+            self.subscribe(existing, channel_id, sizes)
+        return existing
+
+    def channel_products(self, channel_id: int) -> List[Tuple[Product, Tuple[str, ...]]]:
+        """The channel's products in add order, with the sizes it watches."""
+        return [
+            (self.products[key], self.products[key].subscriptions[channel_id])
+            for key in self.channels.get(channel_id, [])
+        ]
+
+    def fan_out(self, product: Product, available_sizes) -> Dict[int, List[str]]:
+        """Split one check result into the in-stock sizes each channel wants."""
+        available = {size.upper() for size in available_sizes}
+        results = {}
+        for channel_id, sizes in product.subscriptions.items():
+            matched = [size for size in sizes if size in available]
+            if matched:
+                results[channel_id] = matched
+        return results
+
+class ProductInfoCache:
+    """Product info recently read from a page, by normalized URL.
+
+    Entries expire ``ttl`` seconds after they were stored; past
+    ``max_entries`` the least recently stored ones are dropped.
+    """
+
+    def __init__(self, ttl: float = PRODUCT_INFO_TTL, max_entries: int = PRODUCT_INFO_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()  # key -> (expires, info)
+
+    def get(self, url: str) -> Optional[dict]:
+        key = normalize_url(url)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, info = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return None
+        return info
+
+    def put(self, url: str, info: dict):
+        key = normalize_url(url)
+        self.entries.pop(key, None)
+        self.entries[key] = (time.monotonic() + self.ttl, info)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
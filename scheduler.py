@@ -0,0 +1,175 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from settings import FAILURE_BACKOFF, SCHEDULE, STORE_MIN_INTERVALS
+
+@dataclass
+class ScheduleEntry:
+    store: str
+    added: float
+    interval: float
+    due: float = 0.0
+    seq: int = 0
+    last_result: Optional[FrozenSet[str]] = None
+    failures: int = 0  # checks failed in a row
+    failure: Optional[str] = None  # kind of the last failure
+    streak: int = 0  # failures in a row of that kind
+
+class CheckScheduler:
+    """Priority queue of product checks ordered by when each is next due.
+
+    Products are keyed by their normalized URL. ``next_due`` hands out one
+    key at a time once its deadline passes; the caller checks the product and
+    reports back through ``record``, which picks the next interval:
+
+    - a result that differs from the previous one, or a product added within
+      ``SCHEDULE['new_window']``, is polled again at the ``fast`` interval
+    - a product with a watched size in stock is polled at ``base``
+    - a product that stays sold out backs off by ``backoff`` up to ``max``
+
+    A failed check is reported through ``failed`` instead and retried after
+    ``FAILURE_BACKOFF['base']``, growing by ``factor`` with every further
+    failure in a row.
+
+    Every interval is kept at or above the store's entry in
+    ``STORE_MIN_INTERVALS`` and jittered so checks spread out over time
+    instead of arriving in bursts. With a ``limiter``, a due product is only
+    handed out once its store and host have a request token to spare; until
+    then it waits in the queue without holding up products of other stores.
+    A ``breaker`` (``CircuitBreaker``) holds back every product of a store
+    whose checks keep failing the same way.
+    """
+
+    def __init__(self, schedule: dict = SCHEDULE, store_min_intervals: dict = STORE_MIN_INTERVALS,
+                 limiter=None, breaker=None, failure_backoff: dict = FAILURE_BACKOFF):
+        self.schedule = schedule
+        self.store_min_intervals = store_min_intervals
+        self.limiter = limiter  # a StoreRateLimiter, or None for no pacing
+        self.breaker = breaker  # a CircuitBreaker, or None to never pause a store
+        self.failure_backoff = failure_backoff
+        self.entries: Dict[str, ScheduleEntry] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def overdue(self) -> int:
+        """Products past their deadline still waiting for a free browser."""
+        now = time.monotonic()
+        return sum(1 for entry in self.entries.values() if entry.due <= now)
+
+    def _clamp(self, store: str, interval: float) -> float:
+        interval = min(max(interval, self.schedule['fast']), self.schedule['max'])
+        return max(interval, self.store_min_intervals.get(store, 0))
+
+    def _push(self, key: str, entry: ScheduleEntry, delay: float):
+        self._push_at(key, entry, time.monotonic() + delay)
+
+    def _push_at(self, key: str, entry: ScheduleEntry, due: float):
+        entry.due = due
+        entry.seq = next(self._seq)
+        heapq.heappush(self._heap, (entry.due, entry.seq, key))
+        self._wakeup.set()
+
+    def add(self, key: str, store: str, delay: float = 0.0):
+        """Start scheduling a product, first due after ``delay`` seconds."""
+        if key in self.entries:
+            return
+        entry = ScheduleEntry(
+            store=store,
+            added=time.monotonic(),
+            interval=self._clamp(store, self.schedule['base'])
+        )
+        self.entries[key] = entry
+        self._push(key, entry, delay)
+
+    def remove(self, key: str):
+        """Stop scheduling a product. Stale heap items are skipped lazily."""
+        self.entries.pop(key, None)
+
+    def record(self, key: str, available_sizes) -> Optional[float]:
+        """Reschedule a product after a check and return the chosen interval."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        result = frozenset(available_sizes)
+        changed = entry.last_result is not None and result != entry.last_result
+        is_new = time.monotonic() - entry.added < self.schedule['new_window']
+
+        if changed or is_new:
+            interval = self.schedule['fast']
+        elif result:
+            interval = self.schedule['base']
+        else:
+            # Stably sold out: back off gradually
+            interval = max(entry.interval, self.schedule['base']) * self.schedule['backoff']
+
+        entry.last_result = result
+        entry.failures = entry.streak = 0
+        entry.failure = None
+        entry.interval = self._clamp(entry.store, interval)
+        self._push(key, entry, self._jitter(entry.interval))
+        return entry.interval
+
+    def failed(self, key: str, kind: str) -> int:
+        """Reschedule a product after a failed check, backing off exponentially.
+
+        Returns how many checks in a row have now failed with ``kind``.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return 0
+        entry.failures += 1
+        entry.streak = entry.streak + 1 if entry.failure == kind else 1
+        entry.failure = kind
+        backoff = self.failure_backoff
+        interval = min(backoff['base'] * backoff['factor'] ** (entry.failures - 1), backoff['max'])
+        self._push(key, entry, self._jitter(max(interval, self.store_min_intervals.get(entry.store, 0))))
+        return entry.streak
+
+    def _jitter(self, interval: float) -> float:
+        jitter = self.schedule['jitter']
+        return interval * random.uniform(1 - jitter, 1 + jitter)
+
+    async def next_due(self) -> str:
+        """Wait until the earliest product is due and return its key.
+
+        The product leaves the queue until ``record`` puts it back, so a slow
+        check is never handed out twice.
+        """
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            while self._heap:
+                due, seq, key = self._heap[0]
+                entry = self.entries.get(key)
+                if entry is None or entry.seq != seq:
+                    heapq.heappop(self._heap)
+                    continue
+                now = time.monotonic()
+                timeout = due - now
+                if timeout <= 0:
+                    heapq.heappop(self._heap)
+                    wait = self.breaker.delay(entry.store, key) if self.breaker else 0
+                    if wait <= 0 and self.limiter:
+                        wait = self.limiter.reserve(entry.store, key)
+                    if wait > 0:
+                        # The store is paused or its request budget is used up; requeue
+                        self._push_at(key, entry, now + wait)
+                        continue
+                    entry.due = float('inf')  # running until record()
+                    return key
+                break
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,40 @@
+import hashlib
+import io
+from dataclasses import dataclass
+import discord
+from settings import SCREENSHOT_FORMAT, SCREENSHOT_QUALITY
+
+@dataclass
+class Screenshot:
+    """An encoded screenshot kept in memory until it is uploaded."""
+    data: bytes
+    filename: str
+    digest: str  # content hash, to spot a repeat of the previous alert image
+
+    def to_file(self) -> discord.File:
+        """A fresh ``discord.File``; each send consumes its own stream."""
+        return discord.File(io.BytesIO(self.data), filename=self.filename)
+
+def encode_screenshot(png: bytes, fmt: str = SCREENSHOT_FORMAT, quality: int = SCREENSHOT_QUALITY) -> Screenshot:
+    """Re-encode a PNG capture as WebP (or JPEG when WebP is unavailable).
+
+    CPU-bound: call it from a worker thread, never on the event loop.
+    """
+    from PIL import Image, features  # loaded with the first screenshot, not at startup
+
+    fmt = fmt.upper()
+    if fmt == 'WEBP' and not features.check('webp'):
+        fmt = 'JPEG'
+
+    image = Image.open(io.BytesIO(png))
+    out = io.BytesIO()
+    if fmt == 'WEBP':
+        image.save(out, format='WEBP', quality=quality, method=4)
+        extension = 'webp'
+    else:
+        image.convert('RGB').save(out, format='JPEG', quality=quality, optimize=True)
+        extension = 'jpg'
+
+    data = out.getvalue()
+    digest = hashlib.sha1(png).hexdigest()
+    return Screenshot(data=data, filename=f"stock_{digest[:12]}.{extension}", digest=digest)
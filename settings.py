@@ -9,7 +9,227 @@ CHECK_INTERVALS = {
     'max': 600   # 10 minutes
 }
 
-SCREENSHOT_DIR = "screenshots"
+# Per-product polling intervals used by the check scheduler, in seconds
+SCHEDULE = {
+    'fast': 60,                          # just added, or availability just changed
+    'base': CHECK_INTERVALS['min'],      # a watched size is in stock
+    'max': CHECK_INTERVALS['max'] * 3,   # ceiling for stably sold-out products
+    'backoff': 1.5,                      # growth per unchanged sold-out check
+    'jitter': 0.2,                       # +/- fraction applied to every interval
+    'new_window': 3600                   # how long a new product counts as new
+}
+
+# No product in a store is checked more often than this, in seconds
+STORE_MIN_INTERVALS = {
+    'zara': 60,
+    'pullandbear': 60,
+    'bershka': 60
+}
+
+# Request budget for each store and host: 'rate' requests per second in
+# bursts of up to 'burst'. A blocked or throttled response multiplies the
+# rate by 'decrease' (down to 'min_rate'); each successful check adds
+# 'recover' back, up to 'rate'.
+STORE_RATE_LIMITS = {
+    'default': {'rate': 1.0, 'burst': 3, 'min_rate': 0.05, 'decrease': 0.5, 'recover': 0.05},
+    'zara': {'rate': 1.0, 'burst': 3, 'min_rate': 0.05, 'decrease': 0.5, 'recover': 0.05},
+    'pullandbear': {'rate': 1.0, 'burst': 3, 'min_rate': 0.05, 'decrease': 0.5, 'recover': 0.05},
+    'bershka': {'rate': 1.0, 'burst': 3, 'min_rate': 0.05, 'decrease': 0.5, 'recover': 0.05}
+}
+# Responses that mean the store is blocking or rate limiting us
+THROTTLE_STATUSES = (403, 429, 503)
+# Responses that mean the product page no longer exists
+GONE_STATUSES = (404, 410)
+
+# A failed check is retried after FAILURE_BACKOFF['base'] seconds, multiplied
+# by 'factor' for every further failure in a row, up to 'max'
+FAILURE_BACKOFF = {'base': 300, 'factor': 2, 'max': 6 * 3600}
+# After 'failures' failed checks in a row of a store (outcomes listed in
+# 'outcomes'), its checks pause for 'cooldown' seconds; then one check probes
+# the store and a failed probe doubles the pause, up to 'max_cooldown'
+STORE_BREAKER = {
+    'failures': 5, 'cooldown': 60, 'max_cooldown': 1800,
+    'outcomes': ('timeout', 'throttled', 'failed')
+}
+# Stop checking a product after this many failures in a row of one kind, and
+# tell its channels; !monitor with the same URL checks it again
+QUARANTINE_AFTER = {'not_found': 3, 'selector_missing': 8}
+
+# chromedriver binary to use; None looks it up with webdriver_manager once
+# and remembers the result in CHROMEDRIVER_CACHE, so later starts need no
+# network. CHROMEDRIVER_VERSION pins the looked-up version (None: latest).
+# The CHROMEDRIVER_PATH environment variable overrides the setting.
+CHROMEDRIVER_PATH = None
+CHROMEDRIVER_VERSION = None
+CHROMEDRIVER_CACHE = ".chromedriver.json"
+
+# Number of Chrome drivers checking products in parallel. Each driver is a
+# full headless Chrome (roughly 150-300 MB RSS), so size this to the host.
+BROWSER_POOL_SIZE = 3
+
+# Run checks in this many separate worker processes, each with its own
+# BROWSER_POOL_SIZE browsers; 0 runs them inside the bot process
+CHECK_WORKERS = 0
+WORKER_STATS_INTERVAL = 5  # seconds between pool reports from each worker
+
+# Replace a driver after this many page loads, or once its Chrome processes
+# use more than this much memory (MB); either can be None to disable it
+DRIVER_MAX_NAVIGATIONS = 200
+DRIVER_MAX_RSS_MB = 600
+
+# Seconds a browser check may take: a page load that runs past
+# PAGE_LOAD_TIMEOUT is stopped and the page read as far as it got, an element
+# the check needs must appear within READY_TIMEOUT, and a check still running
+# after CHECK_DEADLINE has its driver killed and replaced
+PAGE_LOAD_TIMEOUT = 20
+READY_TIMEOUT = 10
+CHECK_DEADLINE = 45
+
+# Read availability from the product page data over plain HTTP and only
+# load the page in Chrome when that fails (or for the alert screenshot).
+HTTP_FAST_PATH = True
+HTTP_POOL_SIZE = 10  # keep-alive connections shared by all stores
+HTTP_TIMEOUT = 15  # seconds
+
+# Local Prometheus-style endpoint at http://METRICS_HOST:METRICS_PORT/metrics;
+# set METRICS_PORT to None to turn it off
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+
+# Query parameters dropped from product URLs before they are compared, so
+# links shared from ads, newsletters or social apps match the same product.
+# Store parameters such as Zara's v1 (the colour variant) are kept.
+TRACKING_PARAMS = {
+    'gclid', 'gbraid', 'wbraid', 'dclid', 'fbclid', 'msclkid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', 'srsltid', 'ttclid', 'twclid'
+}
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+# Product info read when a product is added is reused for this many seconds
+# (e.g. removed and added again) instead of reloading the page
+PRODUCT_INFO_TTL = 600
+PRODUCT_INFO_CACHE_SIZE = 1000
+
+# SQLite file holding monitored products and subscriptions across restarts
+DB_PATH = "stock_monitor.db"
+
+# Log records are written by a background thread, so a burst of errors never
+# waits on the disk or the terminal. LOG_PATH rotates once it reaches
+# LOG_MAX_BYTES, keeping LOG_BACKUPS old files. CHECK_LOG_PATH gets one JSON
+# line per check (product, store, outcome, stage timings) and rotates the
+# same way; None turns it off.
+LOG_LEVEL = 'INFO'
+LOG_PATH = "stock_monitor.log"
+CHECK_LOG_PATH = "checks.log"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# Every check result is kept for !history. Samples are written to DB_PATH
+# every HISTORY_FLUSH_INTERVAL seconds and downsampled every
+# HISTORY_COMPACT_INTERVAL: HISTORY_TIERS lists (max age, bucket) pairs in
+# seconds, a bucket of None keeping every check. Samples older than
+# HISTORY_MAX_AGE are dropped (None keeps them forever).
+HISTORY_FLUSH_INTERVAL = 60
+HISTORY_COMPACT_INTERVAL = 3600
+HISTORY_TIERS = [
+    (2 * 86400, None),   # last 2 days: every check
+    (30 * 86400, 3600),  # up to 30 days: one sample per hour
+    (None, 86400)        # older: one sample per day
+]
+HISTORY_MAX_AGE = 365 * 86400
+
+# Several instances started with --node NAME (or CLUSTER_NODE_ID) against
+# the same DB_PATH split the products between them. A node renews its lease
+# every CLUSTER_HEARTBEAT seconds and counts as dead once it has not for
+# CLUSTER_LEASE_TTL; its products then move to the others. None runs alone.
+CLUSTER_NODE_ID = None
+CLUSTER_HEARTBEAT = 10
+CLUSTER_LEASE_TTL = 30
+CLUSTER_VNODES = 64  # points per node on the hash ring
+
+# Watch list imported on startup; its products go to its 'channel_id'
+CONFIG_PATH = "config.json"
+# Product pages loaded at the same time by a bulk import
+IMPORT_CONCURRENCY = 10
+MAX_IMPORT_BYTES = 1024 * 1024  # largest file !monitor-bulk accepts
+
+# Also tell channels when a watched size sells out again
+NOTIFY_OUT_OF_STOCK = False
+
+# How long driver.get() waits: 'eager' returns once the DOM is parsed instead
+# of waiting for every image, font and third-party script ('normal')
+PAGE_LOAD_STRATEGY = 'eager'
+
+# URL patterns blocked through Chrome DevTools for each resource type
+RESOURCE_TYPE_PATTERNS = {
+    'Image': ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico'],
+    'Font': ['*.woff', '*.woff2', '*.ttf', '*.otf'],
+    'Media': ['*.mp4', '*.webm', '*.m3u8', '*.mov']
+}
+
+TRACKER_PATTERNS = [
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*hotjar.com*', '*tiktok.com*', '*criteo.*',
+    '*pinterest.com*', '*bing.com*', '*analytics*'
+]
+
+# Requests each store's product pages can do without. Size buttons, names
+# and prices come from HTML and first-party scripts, so those stay allowed.
+NETWORK_POLICIES = {
+    'default': {
+        'resource_types': ['Image', 'Font', 'Media'],
+        'blocked_urls': TRACKER_PATTERNS
+    },
+    'zara': {
+        'resource_types': ['Image', 'Font', 'Media'],
+        'blocked_urls': TRACKER_PATTERNS + ['*static.zara.net/video*']
+    },
+    'pullandbear': {
+        'resource_types': ['Image', 'Font', 'Media'],
+        'blocked_urls': TRACKER_PATTERNS
+    },
+    'bershka': {
+        'resource_types': ['Image', 'Font', 'Media'],
+        'blocked_urls': TRACKER_PATTERNS
+    }
+}
+
+# CSS selectors the in-page extraction script reads name, price and sizes
+# from. A size button is in stock when it matches 'in_stock' (if set), is
+# not disabled and its label does not say it is sold out.
+INDITEX_SELECTORS = {
+    'name': 'h1[data-qa-qualifier="product-detail-info-name"]',
+    'price': 'span[data-qa-qualifier="price"]',
+    'sizes': 'button[data-qa-action="size-in-stock"], button[data-qa-action="size-out-of-stock"]',
+    'in_stock': '[data-qa-action="size-in-stock"]'
+}
+EXTRACTION_SELECTORS = {
+    'default': INDITEX_SELECTORS,
+    'zara': INDITEX_SELECTORS,
+    'pullandbear': INDITEX_SELECTORS,
+    'bershka': INDITEX_SELECTORS
+}
+
+# Alerts for one channel arriving within this many seconds share a message
+ALERT_BATCH_WINDOW = 3
+ALERT_WORKERS = 2  # concurrent Discord senders
+# Per-channel message budget; Discord allows about 5 messages per 5 seconds
+ALERT_RATE_LIMIT = {
+    'rate': 1.0,  # messages per second
+    'burst': 5
+}
+
+# Attach a screenshot of the size selector to stock alerts
+ALERT_SCREENSHOTS = True
+
+# Alert screenshots are cropped to the first of these elements found on the
+# page (full window if none) and re-encoded in memory before upload
+SCREENSHOT_SELECTORS = [
+    '[data-qa-action="size-selector"]',
+    '[data-qa-qualifier="product-detail-info"]'
+]
+SCREENSHOT_FORMAT = 'WEBP'  # falls back to JPEG if Pillow lacks WebP
+SCREENSHOT_QUALITY = 80
 
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
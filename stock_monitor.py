@@ -6,28 +6,28 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import discord
 from discord.ext import commands
 import json
-import time
 import random
 import asyncio
 from dataclasses import dataclass
 from typing import List, Optional, Dict
 import logging
-import os
 from datetime import datetime
-from PIL import Image
-import io
+from browser import kill_driver
+from extraction import extract_product
+from logs import setup_logging
+from screenshots import Screenshot, encode_screenshot
+from settings import CHECK_DEADLINE, PAGE_LOAD_TIMEOUT, READY_TIMEOUT
 
-# Configure logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('stock_monitor.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# Where this monitor finds name, price and size buttons on a product page
+PAGE_SELECTORS = {
+    'name': "[data-qa-action='product-name']",
+    'price': "[data-qa-action='product-price']",
+    'sizes': "[data-qa-action='size-selector']",
+    'in_stock': None
+}
+
 @dataclass
 class Product:
     url: str
@@ -45,9 +45,7 @@ class MonitorBot(commands.Bot):
         
         self.products: Dict[str, Product] = {}  # URL -> Product
         self.driver = None
-        self.screenshot_dir = "screenshots"
         self.monitor_task = None
-        self._init_screenshot_dir()
         
         # Add commands
         self.add_command(commands.Command(self.add_product, name="monitor"))
@@ -55,11 +53,6 @@ class MonitorBot(commands.Bot):
         self.add_command(commands.Command(self.remove_product, name="remove"))
         self.add_command(commands.Command(self.help_command, name="help"))
         
-    def _init_screenshot_dir(self):
-        """Create screenshots directory if it doesn't exist."""
-        if not os.path.exists(self.screenshot_dir):
-            os.makedirs(self.screenshot_dir)
-    
     def _init_driver(self):
         """Initialize Chrome driver with optimal settings."""
         if self.driver is None:
@@ -77,7 +70,8 @@ class MonitorBot(commands.Bot):
             options.add_argument(f'user-agent={random.choice(user_agents)}')
             
             self.driver = uc.Chrome(options=options)
-            self.driver.implicitly_wait(10)
+            self.driver.implicitly_wait(READY_TIMEOUT)
+            self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
             
     async def add_product(self, ctx, url: str, *sizes):
         """Add a product to monitor. Usage: !monitor <url> <size1> <size2> ..."""
@@ -92,9 +86,9 @@ class MonitorBot(commands.Bot):
             # Initialize driver if needed
             self._init_driver()
             
-            # Visit the URL to get product name and validate
+            # Visit the URL to get product name and validate; the implicit
+            # wait lets find_element return as soon as the name is rendered
             self.driver.get(url)
-            time.sleep(random.uniform(2, 4))
             
             try:
                 name_element = self.driver.find_element(By.CSS_SELECTOR, "[data-qa-action='product-name']")
@@ -119,7 +113,7 @@ class MonitorBot(commands.Bot):
             await ctx.send(f"✅ Now monitoring {product_name} for sizes: {', '.join(sizes)}")
             
         except Exception as e:
-            logger.error(f"Error adding product {url}: {str(e)}")
+            logger.error("Error adding product %s: %s", url, e)
             await ctx.send(f"❌ Error adding product: {str(e)}")
             
     async def list_products(self, ctx):
@@ -167,76 +161,52 @@ class MonitorBot(commands.Bot):
             
         await ctx.send(embed=help_embed)
         
-    def take_screenshot(self, product: Product) -> Optional[str]:
-        """Take a screenshot of the product page."""
+    def take_screenshot(self, product: Product) -> Optional[Screenshot]:
+        """Take an in-memory screenshot of the size selector area."""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{self.screenshot_dir}/{product.name or 'product'}_{timestamp}.png"
-            
-            # Take screenshot of the size selector area
             size_selector = self.driver.find_element(By.CSS_SELECTOR, "[data-qa-action='size-selector']")
-            screenshot = size_selector.screenshot_as_png
-            
-            # Save and optimize screenshot
-            image = Image.open(io.BytesIO(screenshot))
-            image.save(filename, optimize=True, quality=85)
-            
-            return filename
+            return encode_screenshot(size_selector.screenshot_as_png)
         except Exception as e:
-            logger.error(f"Error taking screenshot: {str(e)}")
+            logger.error("Error taking screenshot: %s", e)
             return None
             
-    def check_stock(self, product: Product) -> tuple[List[str], Optional[str]]:
-        """Check stock availability for a product."""
+    def check_stock(self, product: Product) -> tuple[List[str], Optional[Screenshot]]:
+        """Check stock availability for a product (blocking; run it in a thread)."""
         available_sizes = []
-        screenshot_path = None
+        screenshot = None
         
         try:
+            self._init_driver()  # a missed deadline left no browser
             self.driver.get(product.url)
-            time.sleep(random.uniform(2, 4))
-            
-            # Update product price if available
-            try:
-                price_element = self.driver.find_element(By.CSS_SELECTOR, "[data-qa-action='product-price']")
-                product.price = price_element.text.strip()
-            except:
-                pass
             
-            # Wait for size selector to be present
-            size_elements = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "[data-qa-action='size-selector']"))
+            # Continue as soon as the size selector is present
+            WebDriverWait(self.driver, READY_TIMEOUT).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-qa-action='size-selector']"))
             )
             
-            for element in size_elements:
-                size_text = element.text.strip()
-                if size_text in product.sizes:
-                    try:
-                        # Check if size is not marked as unavailable
-                        is_available = not ("OUT OF STOCK" in element.text.upper() or 
-                                         "SOLD OUT" in element.text.upper() or
-                                         element.get_attribute("disabled"))
-                        if is_available:
-                            available_sizes.append(size_text)
-                    except Exception as e:
-                        logger.error(f"Error checking size {size_text}: {str(e)}")
+            # Read price and every size's availability in one round trip
+            info = extract_product(self.driver, PAGE_SELECTORS)
+            if info['price']:
+                product.price = info['price']
+            available_sizes = [size for size in product.sizes if info['sizes'].get(size.upper())]
             
             if available_sizes:
-                screenshot_path = self.take_screenshot(product)
+                screenshot = self.take_screenshot(product)
                 
         except TimeoutException:
-            logger.error(f"Timeout while checking product: {product.url}")
+            logger.error("Timeout while checking product: %s", product.url)
         except Exception as e:
-            logger.error(f"Error checking product {product.url}: {str(e)}")
+            logger.error("Error checking product %s: %s", product.url, e)
             
         product.last_check = datetime.now()
-        return available_sizes, screenshot_path
+        return available_sizes, screenshot
         
-    async def send_notification(self, product: Product, available_sizes: List[str], screenshot_path: Optional[str]):
+    async def send_notification(self, product: Product, available_sizes: List[str], screenshot: Optional[Screenshot]):
         """Send notification about available sizes via Discord."""
         try:
             channel = self.get_channel(product.channel_id)
             if not channel:
-                logger.error(f"Could not find channel {product.channel_id}")
+                logger.error("Could not find channel %s", product.channel_id)
                 return
                 
             embed = discord.Embed(
@@ -254,35 +224,41 @@ class MonitorBot(commands.Bot):
             embed.add_field(name="Product Link", value=product.url)
             
             # Send screenshot if available
-            if screenshot_path and os.path.exists(screenshot_path):
-                file = discord.File(screenshot_path)
-                await channel.send(embed=embed, file=file)
-                # Clean up screenshot
-                os.remove(screenshot_path)
+            if screenshot:
+                await channel.send(embed=embed, file=screenshot.to_file())
             else:
                 await channel.send(embed=embed)
                 
         except Exception as e:
-            logger.error(f"Error sending Discord notification: {str(e)}")
+            logger.error("Error sending Discord notification: %s", e)
             
     async def monitor_stock(self):
         """Main monitoring loop."""
         try:
-            self._init_driver()
+            await asyncio.to_thread(self._init_driver)
             
             while self.products:  # Run while there are products to monitor
                 for product in list(self.products.values()):
-                    available_sizes, screenshot_path = self.check_stock(product)
+                    try:
+                        available_sizes, screenshot = await asyncio.wait_for(
+                            asyncio.to_thread(self.check_stock, product), CHECK_DEADLINE
+                        )
+                    except asyncio.TimeoutError:
+                        # Unblock the stuck thread; the next check starts a new browser
+                        logger.error("Check of %s missed the %ss deadline", product.url, CHECK_DEADLINE)
+                        kill_driver(self.driver)
+                        self.driver = None
+                        continue
                     
                     if available_sizes:
-                        logger.info(f"Found stock for {product.name or 'Product'}: {available_sizes}")
-                        await self.send_notification(product, available_sizes, screenshot_path)
+                        logger.info("Found stock for %s: %s", product.name or 'Product', available_sizes)
+                        await self.send_notification(product, available_sizes, screenshot)
                     
                     # Random delay between checks
                     await asyncio.sleep(random.uniform(300, 600))  # 5-10 minutes
                     
         except Exception as e:
-            logger.error(f"Error in monitor_stock: {str(e)}")
+            logger.error("Error in monitor_stock: %s", e)
         finally:
             if self.driver:
                 self.driver.quit()
@@ -295,5 +271,6 @@ class MonitorBot(commands.Bot):
         await super().close()
         
 if __name__ == "__main__":
+    setup_logging()
     bot = MonitorBot()
-    bot.run("YOUR_DISCORD_BOT_TOKEN")
\ No newline at end of file
+    bot.run("YOUR_DISCORD_BOT_TOKEN", log_handler=None)
\ No newline at end of file
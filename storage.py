@@ -0,0 +1,204 @@
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from models import Product
+from registry import ProductRegistry, normalize_url
+from settings import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    key TEXT PRIMARY KEY,      -- normalized URL
+    url TEXT NOT NULL,         -- URL as first added
+    store TEXT NOT NULL,
+    name TEXT,
+    price TEXT,
+    last_check TEXT,
+    availability TEXT,         -- JSON object, size -> in stock
+    revision INTEGER NOT NULL DEFAULT 0,  -- bumped when its subscriptions change
+    quarantined TEXT           -- why it is no longer checked; NULL while it is
+);
+CREATE TABLE IF NOT EXISTS subscriptions (
+    key TEXT NOT NULL REFERENCES products(key) ON DELETE CASCADE,
+    channel_id INTEGER NOT NULL,
+    sizes TEXT NOT NULL,       -- JSON list
+    PRIMARY KEY (key, channel_id)
+);
+"""
+
+class ProductStore:
+    """SQLite copy of the product registry.
+
+    Every add, remove and check is written straight through as a single
+    small statement; WAL mode keeps those writes cheap and lets the file be
+    read while the bot is running. ``load`` rebuilds a registry from the
+    stored rows without touching the network.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add columns introduced after a database was first created."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(products)")}
+        if 'availability' not in columns:
+            self.conn.execute("ALTER TABLE products ADD COLUMN availability TEXT")
+        if 'revision' not in columns:
+            self.conn.execute("ALTER TABLE products ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        if 'quarantined' not in columns:
+            self.conn.execute("ALTER TABLE products ADD COLUMN quarantined TEXT")
+        self._rekey()
+
+    def _rekey(self):
+        """Move rows whose key was normalized under older ``normalize_url`` rules.
+
+        Products that now share a key are merged; a channel subscribed to
+        more than one of them keeps the first subscription.
+        """
+        stale = [
+            (key, normalize_url(url))
+            for key, url in self.conn.execute("SELECT key, url FROM products")
+            if key != normalize_url(url)
+        ]
+        if not stale:
+            return
+        with self.conn:
+            for old, new in stale:
+                self.conn.execute(
+                    "INSERT INTO products (key, url, store, name, price, last_check, availability) "
+                    "SELECT ?, url, store, name, price, last_check, availability FROM products WHERE key = ? "
+                    "ON CONFLICT(key) DO NOTHING",
+                    (new, old)
+                )
+                self.conn.execute("UPDATE OR IGNORE subscriptions SET key = ? WHERE key = ?", (new, old))
+                self.conn.execute("DELETE FROM products WHERE key = ?", (old,))
+        logger.info("Re-keyed %s saved products to the current URL normalization", len(stale))
+
+    def save_subscription(self, product: Product, channel_id: int):
+        """Store the product (if new) and one channel's subscription to it."""
+        key = normalize_url(product.url)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO products (key, url, store, name, price, last_check) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO NOTHING",
+                (key, product.url, product.store, product.name, product.price_text,
+                 product.last_check.isoformat() if product.last_check else None)
+            )
+            self.conn.execute(
+                "INSERT INTO subscriptions (key, channel_id, sizes) VALUES (?, ?, ?) "
+                "ON CONFLICT(key, channel_id) DO UPDATE SET sizes = excluded.sizes",
+                (key, channel_id, json.dumps(product.subscriptions[channel_id]))
+            )
+            self.conn.execute("UPDATE products SET revision = revision + 1 WHERE key = ?", (key,))
+
+    def delete_subscription(self, product: Product, channel_id: int):
+        """Remove a subscription, and the product once nobody watches it."""
+        key = normalize_url(product.url)
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM subscriptions WHERE key = ? AND channel_id = ?",
+                (key, channel_id)
+            )
+            if not product.subscriptions:
+                self.conn.execute("DELETE FROM products WHERE key = ?", (key,))
+            else:
+                self.conn.execute("UPDATE products SET revision = revision + 1 WHERE key = ?", (key,))
+
+    def record_check(self, product: Product):
+        """Persist what a stock check learned about a product."""
+        self.conn.execute(
+            "UPDATE products SET price = ?, last_check = ?, availability = ? WHERE key = ?",
+            (product.price_text,
+             product.last_check.isoformat() if product.last_check else None,
+             json.dumps(product.availability),
+             normalize_url(product.url))
+        )
+
+    def quarantine(self, product: Product, reason: Optional[str]):
+        """Mark a product as no longer checked, or (``None``) checked again."""
+        self.conn.execute(
+            "UPDATE products SET quarantined = ? WHERE key = ?", (reason, normalize_url(product.url))
+        )
+
+    def quarantined(self) -> Dict[str, str]:
+        """Keys of the products no longer checked, with the reason."""
+        return dict(self.conn.execute("SELECT key, quarantined FROM products WHERE quarantined IS NOT NULL"))
+
+    @staticmethod
+    def _product(url, store, name, price, last_check, availability) -> Product:
+        product = Product(url=url, sizes=[], store=store, name=name, price=price)
+        if last_check:
+            product.last_check = datetime.fromisoformat(last_check)
+        if availability:
+            product.availability = json.loads(availability)
+        return product
+
+    def load(self, registry: ProductRegistry) -> List[Product]:
+        """Fill ``registry`` from the database and return the loaded products."""
+        products = {}
+        for key, *row in self.conn.execute(
+            "SELECT key, url, store, name, price, last_check, availability FROM products"
+        ):
+            products[key] = self._product(*row)
+        # rowid order is the order channels subscribed in
+        for key, channel_id, sizes in self.conn.execute(
+            "SELECT key, channel_id, sizes FROM subscriptions ORDER BY rowid"
+        ):
+            product = products.get(key)
+            if product:
+                registry.subscribe(product, channel_id, json.loads(sizes))
+        logger.info("Loaded %s products from %s", len(registry), self.path)
+        return list(registry)
+
+    def revisions(self) -> Dict[str, int]:
+        """Every stored product key with its subscription revision."""
+        return dict(self.conn.execute("SELECT key, revision FROM products"))
+
+    def reload(self, registry: ProductRegistry, keys: Iterable[str]) -> List[Product]:
+        """Bring the subscriptions of ``keys`` in ``registry`` up to date.
+
+        For products another bot instance added, removed or re-subscribed.
+        Returns the products still watched.
+        """
+        reloaded = []
+        for key in keys:
+            row = self.conn.execute(
+                "SELECT url, store, name, price, last_check, availability FROM products WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                registry.drop(key)
+                continue
+            subscriptions = {
+                channel_id: json.loads(sizes)
+                for channel_id, sizes in self.conn.execute(
+                    "SELECT channel_id, sizes FROM subscriptions WHERE key = ? ORDER BY rowid", (key,)
+                )
+            }
+            product = registry.resubscribe(registry.products.get(key) or self._product(*row), subscriptions)
+            if product:
+                reloaded.append(product)
+        return reloaded
+
+    def refresh(self, product: Product):
+        """Read back the last check another bot instance saved for ``product``."""
+        row = self.conn.execute(
+            "SELECT price, last_check, availability FROM products WHERE key = ?", (normalize_url(product.url),)
+        ).fetchone()
+        if row is None:
+            return
+        saved = self._product(product.url, product.store, product.name, *row)
+        product.price, product.currency = saved.price, saved.currency
+        product.checked_at = saved.checked_at
+        product.in_stock, product.checked_sizes = saved.in_stock, saved.checked_sizes
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The modules live at the top of the repository, next to this directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(ROOT, "fixtures")
+
+def fixture_page(store: str) -> str:
+    with open(os.path.join(FIXTURES, f"{store}.html"), encoding="utf-8") as f:
+        return f.read()
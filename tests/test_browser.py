@@ -0,0 +1,45 @@
+"""How a browser check reads a page that has no add to cart button."""
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+import browser
+from browser import BrowserHandler
+from failures import SELECTOR_MISSING, TIMEOUT, CheckFailed
+from models import Product
+
+class PageDriver:
+    """A loaded page without an add to cart button, optionally with a product name."""
+
+    def __init__(self, has_name: bool, ready_state: str = 'complete'):
+        self.has_name = has_name
+        self.ready_state = ready_state
+
+    def find_element(self, by, value):
+        raise NoSuchElementException(value)
+
+    def find_elements(self, by, value):
+        return [object()] if self.has_name else []
+
+    def execute_script(self, script, *args):
+        return self.ready_state
+
+@pytest.fixture
+def check(monkeypatch):
+    monkeypatch.setattr(browser, 'load_page', lambda driver, store, url: None)
+    monkeypatch.setattr(browser, 'READY_TIMEOUT', 0.01)
+    handler = BrowserHandler(pool_size=1, http_fast_path=False, screenshots=False)
+    product = Product(url='https://www.zara.com/es/en/p1.html', sizes=['S'], store='zara')
+    yield lambda driver: handler._check_stock(driver, product)
+    handler.close()
+
+def test_product_without_add_to_cart_is_sold_out(check):
+    assert check(PageDriver(has_name=True)) == ([], None)
+
+def test_loaded_page_without_product_markup_is_selector_missing(check):
+    with pytest.raises(CheckFailed) as failed:
+        check(PageDriver(has_name=False))
+    assert failed.value.kind == SELECTOR_MISSING
+
+def test_page_still_loading_is_a_timeout(check):
+    with pytest.raises(CheckFailed) as failed:
+        check(PageDriver(has_name=False, ready_state='loading'))
+    assert failed.value.kind == TIMEOUT
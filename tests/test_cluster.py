@@ -0,0 +1,80 @@
+"""Splitting products between nodes, with the in-process lease backend."""
+import pytest
+import cluster
+from cluster import ClusterNode, HashRing, MemoryLeases
+
+KEYS = [f"https://www.zara.com/es/en/product-{i}.html" for i in range(200)]
+
+class Clock:
+    """Stands in for the ``time`` module so leases can expire on demand."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cluster, 'time', clock)
+    return clock
+
+def settle(*nodes, rounds: int = 3):
+    """Heartbeat rounds until handed-off keys have been claimed."""
+    for _ in range(rounds):
+        for node in nodes:
+            node.rebalance(KEYS)
+
+def test_two_nodes_split_the_keys_without_overlap(clock):
+    leases = MemoryLeases()
+    a, b = ClusterNode('a', leases, ttl=30), ClusterNode('b', leases, ttl=30)
+    gained, lost = a.rebalance(KEYS)
+    assert gained == set(KEYS) and not lost  # alone at first
+
+    # b joins: a still holds everything, so b gets nothing until a lets go
+    assert b.rebalance(KEYS) == (set(), set())
+    gained, lost = a.rebalance(KEYS)
+    assert not gained and lost
+    gained, _ = b.rebalance(KEYS)
+    assert gained == lost
+
+    assert not a.owned & b.owned
+    assert a.owned | b.owned == set(KEYS)
+    assert 60 < len(a.owned) < 140  # roughly even with 64 points per node
+    ring = HashRing(['a', 'b'])
+    assert all(ring.owner(key) == 'a' for key in a.owned)
+
+def test_keys_of_a_dead_node_are_taken_over(clock):
+    leases = MemoryLeases()
+    a, b = ClusterNode('a', leases, ttl=30), ClusterNode('b', leases, ttl=30)
+    settle(a, b)
+    held_by_a = set(a.owned)
+
+    clock.now += 10
+    b.rebalance(KEYS)
+    assert not b.owned & held_by_a  # a's lease is still valid
+
+    clock.now += 25  # a has missed its heartbeats for longer than the ttl
+    gained, lost = b.rebalance(KEYS)
+    assert gained == held_by_a and not lost
+    assert b.owned == set(KEYS)
+
+def test_leaving_hands_keys_over_right_away(clock):
+    leases = MemoryLeases()
+    a, b = ClusterNode('a', leases, ttl=30), ClusterNode('b', leases, ttl=30)
+    settle(a, b)
+    held_by_a = set(a.owned)
+
+    a.leave()
+    assert not a.owned
+    gained, _ = b.rebalance(KEYS)
+    assert gained == held_by_a
+    assert b.owned == set(KEYS)
+
+def test_channels_are_answered_by_exactly_one_node(clock):
+    leases = MemoryLeases()
+    a, b = ClusterNode('a', leases, ttl=30), ClusterNode('b', leases, ttl=30)
+    settle(a, b)
+    for channel_id in range(50):
+        assert a.handles(f"channel:{channel_id}") != b.handles(f"channel:{channel_id}")
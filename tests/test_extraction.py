@@ -0,0 +1,119 @@
+"""Reading name, price and sizes from the pages in fixtures/."""
+import shutil
+import pytest
+from conftest import fixture_page
+from extraction import EXTRACT_PRODUCT_JS, extract_product, extraction_selectors
+from fetchers import FETCHERS, _availability, parse_ld_json, parse_view_payload
+
+# What the fixture pages have, per store
+EXPECTED = {
+    'zara': ('OVERSIZED BLAZER', '59.95 EUR', {'S', 'M'}, {'XS', 'S', 'M', 'L', 'XL'}),
+    'pullandbear': ('STRAIGHT FIT JEANS', '29.99 EUR', {'34', '38'}, {'34', '36', '38', '40', '42'}),
+    'bershka': ('FAUX LEATHER JACKET', '45.99 EUR', {'M', 'L'}, {'XS', 'S', 'M', 'L', 'XL'})
+}
+
+def in_stock(info: dict) -> set:
+    return {size for size, available in info['sizes'].items() if available}
+
+@pytest.mark.parametrize("store", sorted(EXPECTED))
+def test_store_fetcher_reads_fixture_page(store):
+    name, price, available, sizes = EXPECTED[store]
+    info = FETCHERS[store].parse(fixture_page(store))
+    assert info['name'] == name
+    assert info['price'] == price
+    assert set(info['sizes']) == sizes
+    assert in_stock(info) == available
+
+def test_view_payload_is_zara_only():
+    assert parse_view_payload(fixture_page('zara'))['name'] == 'OVERSIZED BLAZER'
+    assert parse_view_payload(fixture_page('pullandbear')) is None
+    # Zara's page carries no schema.org product blocks
+    assert parse_ld_json(fixture_page('zara')) is None
+
+def test_parsers_reject_pages_without_product_data():
+    html = "<html><body><h1>Page not found</h1></body></html>"
+    assert parse_ld_json(html) is None
+    assert parse_view_payload(html) is None
+    assert FETCHERS['bershka'].parse(html) is None
+
+def test_parsers_skip_broken_json():
+    html = '<script type="application/ld+json">{not json</script>'
+    assert parse_ld_json(html) is None
+    assert parse_view_payload('<script>window.zara.viewPayload = {oops};</script>') is None
+
+@pytest.mark.parametrize("value, expected", [
+    ("https://schema.org/InStock", True),
+    ("https://schema.org/LimitedAvailability", True),
+    ("http://schema.org/OutOfStock", False),
+    ("in_stock", True),
+    ("low_on_stock", True),
+    ("out_of_stock", False),
+    (True, True),
+    (None, False),
+])
+def test_availability_flags(value, expected):
+    assert _availability(value) is expected
+
+class ScriptDriver:
+    """Answers ``execute_script`` with a canned result and records the call."""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def execute_script(self, script, *args):
+        self.calls.append((script, args))
+        return self.result
+
+def test_extract_product_runs_one_script_with_the_store_selectors():
+    selectors = extraction_selectors('zara')
+    driver = ScriptDriver({'name': 'BLAZER', 'price': '59,95 EUR', 'sizes': {'S': True, 'M': 0, 'L': 1}})
+    assert extract_product(driver, selectors) == {
+        'name': 'BLAZER', 'price': '59,95 EUR', 'sizes': {'S': True, 'M': False, 'L': True}
+    }
+    assert driver.calls == [(EXTRACT_PRODUCT_JS, (selectors,))]
+
+@pytest.mark.parametrize("result", [None, {}, {'name': '', 'price': '', 'sizes': None}])
+def test_extract_product_maps_missing_elements_to_none(result):
+    assert extract_product(ScriptDriver(result), extraction_selectors('bershka')) == {
+        'name': None, 'price': None, 'sizes': {}
+    }
+
+def test_unknown_store_uses_default_selectors():
+    assert extraction_selectors('cos') == extraction_selectors('default')
+
+CHROME = next(
+    (shutil.which(name) for name in ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+     if shutil.which(name)),
+    None
+)
+
+@pytest.fixture(scope="module")
+def chrome():
+    if not CHROME:
+        pytest.skip("Chrome is not installed")
+    from browser import BrowserPool
+    try:
+        driver = BrowserPool.create_driver()
+    except Exception as e:
+        pytest.skip(f"Chrome could not be started: {e}")
+    yield driver
+    driver.quit()
+
+@pytest.mark.parametrize("store", sorted(EXPECTED))
+def test_extract_product_script_in_chrome(chrome, store):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from fixture_server import FixtureServer
+
+    name, _, available, sizes = EXPECTED[store]
+    selectors = extraction_selectors(store)
+    with FixtureServer() as server:
+        chrome.get(server.url(store))
+        WebDriverWait(chrome, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, selectors['sizes'])))
+        info = extract_product(chrome, selectors)
+    assert info['name'] == name
+    assert info['price']
+    assert set(info['sizes']) == sizes
+    assert in_stock(info) == available
@@ -0,0 +1,47 @@
+"""Availability history shared by several instances in one database."""
+from history import HistoryStore, Samples, downsample
+
+def test_instances_share_bit_positions(tmp_path):
+    path = str(tmp_path / "history.db")
+    b = HistoryStore(path)  # opened before a records anything
+    a = HistoryStore(path)
+    a.record('shirt', ['S', 'M'], 19.95, when=1000)
+    a.record('shirt', [], 19.95, when=1100)
+    a.flush()
+    # The product moved to b
+    b.record('shirt', ['M'], 19.95, when=1200)
+    b.flush()
+
+    timeline = HistoryStore(path).timeline('shirt')
+    assert [start.timestamp() for start, _ in timeline.restocks['S']] == [1000]
+    assert [start.timestamp() for start, _ in timeline.restocks['M']] == [1000, 1200]
+    # a sees the sizes b added too
+    assert a.timeline('shirt').restocks == timeline.restocks
+
+def test_size_list_is_never_shortened(tmp_path):
+    path = str(tmp_path / "history.db")
+    a, b = HistoryStore(path), HistoryStore(path)
+    a.record('shirt', ['S', 'M', 'L'], None, when=1000)
+    b.record('shirt', ['XL'], None, when=1100)
+    assert b.sizes['shirt'] == ['S', 'M', 'L', 'XL']
+    assert HistoryStore(path).sizes['shirt'] == ['S', 'M', 'L', 'XL']
+
+def test_downsampling_keeps_restocks_and_last_price():
+    samples = Samples()
+    day = 86400
+    samples.append(0, 0b01, 10.0)
+    samples.append(600, 0b10, 12.0)
+    samples.append(1200, 0, float('nan'))
+    merged = downsample(samples, now=40 * day, tiers=[(day, None), (None, 3600)], max_age=None)
+    assert list(merged.times) == [0]
+    assert list(merged.bits) == [0b11]
+    assert list(merged.prices) == [12.0]
+
+def test_sizes_with_spaces(tmp_path):
+    path = str(tmp_path / "history.db")
+    history = HistoryStore(path)
+    history.record('bag', ['ONE SIZE'], None, when=1000)
+    history.flush()
+    history.record('bag', ['ONE SIZE'], None, when=1100)
+    assert HistoryStore(path).sizes['bag'] == ['ONE SIZE']
+    assert list(history.timeline('bag', ['ONE SIZE']).restocks) == ['ONE SIZE']
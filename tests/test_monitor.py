@@ -0,0 +1,107 @@
+"""The monitor cog against the fixture server, over the HTTP fast path."""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from benchmarks.fakes import FakeBot
+from browser import BrowserHandler
+from fixture_server import FixtureServer
+from metrics import CYCLE_SECONDS
+from models import Product
+from monitor import StockMonitorCog
+from registry import normalize_url
+from storage import ProductStore
+
+class FakeContext:
+    """A command context whose replies are kept in ``sent``."""
+
+    def __init__(self, channel_id: int):
+        self.channel = type('Channel', (), {'id': channel_id})()
+        self.sent = []
+
+    async def send(self, content=None, *, embed=None):
+        self.sent.append(embed.to_dict() if embed else content)
+
+@asynccontextmanager
+async def monitor():
+    with FixtureServer() as server:
+        browser = BrowserHandler(pool_size=1, http_fast_path=True, screenshots=False)
+        cog = StockMonitorCog(FakeBot(), browser, ProductStore(":memory:"))
+        cog.monitoring_task.cancel()  # checks are run by the tests
+        try:
+            yield cog, server
+        finally:
+            await cog.cog_unload()
+
+def fields(embed: dict) -> dict:
+    return {field['name']: field['value'] for field in embed.get('fields', [])}
+
+def test_readding_a_removed_product_checks_it_again():
+    async def run():
+        async with monitor() as (cog, server):
+            url = server.url('zara')
+            key = normalize_url(url)
+            ctx = FakeContext(1)
+            await cog.add_product(ctx, 'zara', url, 'S', 'L')
+            assert fields(ctx.sent[-1])['In Stock Now'] == 'S'
+            assert len(cog.history.read(key)) == 1
+
+            await cog.remove_product(ctx, 1)
+            await cog.add_product(ctx, 'zara', url, 'S', 'L')
+            # Name and price came from the cache, availability did not
+            assert ctx.sent[-1]['description'] == 'Now monitoring OVERSIZED BLAZER'
+            assert 'In Stock Now' not in fields(ctx.sent[-1])
+            assert cog.products.get(url).last_check is None
+            assert len(cog.history.read(key)) == 0
+            assert cog.scheduler.entries[key].due <= time.monotonic()
+    asyncio.run(run())
+
+def test_cycle_gauge_counts_only_scheduled_products():
+    async def run():
+        async with monitor() as (cog, server):
+            # Watched here, but checked by another instance
+            elsewhere = Product(url=server.url('bershka'), sizes=[], store='bershka', name='Jacket')
+            cog.products.subscribe(elsewhere, 2, ['M'])
+            ctx = FakeContext(1)
+            await cog.add_product(ctx, 'zara', server.url('zara'), 'S')
+            CYCLE_SECONDS.values.clear()
+
+            await cog.check_product(cog.products.get(server.url('zara')))
+            assert CYCLE_SECONDS.values
+    asyncio.run(run())
+
+def test_quarantined_product_does_not_hold_up_the_cycle():
+    async def run():
+        async with monitor() as (cog, server):
+            dead = Product(url=server.base_url + '/discontinued/p1.html', sizes=[], store='zara', name='Gone')
+            cog.products.subscribe(dead, 1, ['S'])
+            cog._schedule(normalize_url(dead.url), 'zara')
+            ctx = FakeContext(1)
+            await cog.add_product(ctx, 'zara', server.url('zara'), 'S')
+            for _ in range(3):
+                await cog.check_product(dead)
+            assert normalize_url(dead.url) in cog.quarantined
+            assert cog.products.get(dead.url) is not None
+            CYCLE_SECONDS.values.clear()
+
+            await cog.check_product(cog.products.get(server.url('zara')))
+            assert CYCLE_SECONDS.values
+    asyncio.run(run())
+
+def test_product_removed_mid_check_leaves_no_history():
+    async def run():
+        async with monitor() as (cog, server):
+            url = server.url('zara')
+            ctx = FakeContext(1)
+            await cog.add_product(ctx, 'zara', url, 'S')
+            product = cog.products.get(url)
+            check_stock = cog.browser.check_stock
+
+            async def removed_while_loading(product):
+                result = await check_stock(product)
+                await cog.remove_product(ctx, 1)
+                return result
+            cog.browser.check_stock = removed_while_loading
+            await cog.check_product(product)
+            assert normalize_url(url) not in cog.history.sizes
+            assert len(cog.history.read(normalize_url(url))) == 0
+    asyncio.run(run())
@@ -0,0 +1,294 @@
+"""Stock checks in separate worker processes.
+
+``WorkerClient`` has the same interface as ``BrowserHandler``
+(``get_product_info``, ``check_stock``, ``concurrency``, ``pool``, ``close``)
+but runs every check in one of ``CHECK_WORKERS`` child processes. Each child
+owns a ``BrowserHandler`` with its own Chrome pool and HTTP session. The bot
+process keeps the Discord connection, the scheduler and the notifier, so
+checks can use every core and a crashing browser or worker cannot take the
+bot down with it. A worker that dies is restarted and its in-flight checks
+count as failed.
+"""
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+from typing import Dict, List, Optional
+from failures import FAILED, TIMEOUT, CheckFailed
+from logs import forward_logs, setup_worker_logging
+from ratelimit import Throttled
+from settings import BROWSER_POOL_SIZE, CHECK_DEADLINE, CHECK_WORKERS, WORKER_STATS_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+class WorkerCrashed(RuntimeError):
+    """The worker process running a request exited before answering."""
+
+def _worker_main(number: int, options: dict, requests, responses, logs):
+    """Entry point of a worker process: serve requests until told to stop."""
+    setup_worker_logging(logs)
+    try:
+        asyncio.run(_serve(number, options, requests, responses))
+    except KeyboardInterrupt:
+        pass
+
+async def _serve(number: int, options: dict, requests, responses):
+    from browser import BrowserHandler  # only worker processes load Selenium
+
+    browser = BrowserHandler(**options)
+    loop = asyncio.get_running_loop()
+    tasks = set()
+
+    async def handle(request_id, method, args):
+        try:
+            result = await getattr(browser, method)(*args)
+            responses.put((number, request_id, True, result))
+        except (Throttled, CheckFailed) as e:
+            responses.put((number, request_id, False, e))
+        except Exception as e:
+            responses.put((number, request_id, False, f"{type(e).__name__}: {e}"))
+
+    async def report_stats():
+        pool = browser.pool
+        while True:
+            responses.put((number, None, True, {
+                'in_use': pool.in_use,
+                'stats': dict(pool.stats),
+                'memory': pool.memory()
+            }))
+            await asyncio.sleep(WORKER_STATS_INTERVAL)
+
+    logger.info("Check worker %s started with %s browsers", number, browser.concurrency)
+    stats_task = asyncio.create_task(report_stats())
+    try:
+        while True:
+            request = await loop.run_in_executor(None, requests.get)
+            if request is None:
+                break
+            task = asyncio.create_task(handle(*request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        stats_task.cancel()
+        for task in tasks:
+            task.cancel()
+        await browser.aclose()
+        logger.info("Check worker %s stopped", number)
+
+class WorkerProcess:
+    """Bookkeeping for one child process, as seen from the bot process."""
+
+    def __init__(self, number: int, context, options: dict, responses, logs):
+        self.number = number
+        self.requests = context.Queue()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(number, options, self.requests, responses, logs),
+            name=f"check-worker-{number}",
+            daemon=True
+        )
+        self.pending: Dict[int, asyncio.Future] = {}  # request id -> future
+        self.stats: dict = {}  # last report from the worker
+        self.process.start()
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self, timeout: float = 10):
+        if self.alive():
+            try:
+                self.requests.put(None)
+            except (OSError, ValueError):
+                pass
+            self.process.join(timeout)
+        if self.alive():
+            self.process.terminate()
+            self.process.join(1)
+
+class WorkerPoolView:
+    """Browser pool numbers summed over all workers, for the metrics gauges."""
+
+    def __init__(self, client: 'WorkerClient'):
+        self.client = client
+
+    @property
+    def in_use(self) -> int:
+        return sum(worker.stats.get('in_use', 0) for worker in self.client.workers)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        totals = {'started': 0, 'restarts': 0, 'recycled': 0}
+        for worker in self.client.workers:
+            for event, count in worker.stats.get('stats', {}).items():
+                totals[event] = totals.get(event, 0) + count
+        totals['worker_restarts'] = self.client.restarts
+        return totals
+
+    def memory(self) -> Dict[str, Optional[int]]:
+        return {
+            f"{worker.number}.{driver}": rss
+            for worker in self.client.workers
+            for driver, rss in worker.stats.get('memory', {}).items()
+        }
+
+class WorkerClient:
+    """Drop-in replacement for ``BrowserHandler`` backed by worker processes.
+
+    Requests go to the worker with the fewest checks in flight over its own
+    ``multiprocessing`` queue; all workers answer on one shared queue that a
+    reader thread hands back to the event loop. Workers are started with
+    ``spawn`` so they never inherit the bot's event loop or Discord sockets.
+    Extra keyword arguments are passed to each worker's ``BrowserHandler``.
+    """
+
+    def __init__(self, workers: int = CHECK_WORKERS, pool_size: int = BROWSER_POOL_SIZE,
+                 timeout: float = CHECK_DEADLINE * 2, **options):
+        if workers < 1:
+            raise ValueError("Need at least one check worker")
+        self.pool_size = pool_size
+        self.options = dict(options, pool_size=pool_size)  # BrowserHandler arguments
+        self.timeout = timeout  # seconds before a request is given up on
+        self.context = multiprocessing.get_context("spawn")
+        self.responses = self.context.Queue()
+        self.logs = self.context.Queue()  # log records of every worker
+        self.log_listener = forward_logs(self.logs)
+        self.workers: List[WorkerProcess] = [self._spawn(number) for number in range(1, workers + 1)]
+        self.pool = WorkerPoolView(self)
+        self.restarts = 0
+        self._ids = itertools.count()
+        self._loop = None
+        self._reader = None
+        self._watchdog = None
+        self._closed = False
+
+    def _spawn(self, number: int) -> WorkerProcess:
+        return WorkerProcess(number, self.context, self.options, self.responses, self.logs)
+
+    @property
+    def concurrency(self) -> int:
+        """Number of checks that can run at the same time."""
+        return len(self.workers) * self.pool_size
+
+    def _start(self):
+        """Start the response reader and the crash watchdog on first use."""
+        if self._loop:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._reader = threading.Thread(target=self._read_responses, name="worker-responses", daemon=True)
+        self._reader.start()
+        self._watchdog = asyncio.create_task(self._watch())
+
+    def _read_responses(self):
+        while not self._closed:
+            try:
+                response = self.responses.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self._loop.call_soon_threadsafe(self._resolve, *response)
+
+    def _resolve(self, number: int, request_id: Optional[int], ok: bool, result):
+        worker = self.workers[number - 1]
+        if request_id is None:
+            worker.stats = result
+            return
+        future = worker.pending.pop(request_id, None)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(result)
+        elif isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_exception(RuntimeError(result))
+
+    async def _watch(self):
+        """Restart workers that died and fail the requests they were running."""
+        while True:
+            await asyncio.sleep(1)
+            for index, worker in enumerate(self.workers):
+                if worker.alive() or self._closed:
+                    continue
+                logger.error("Check worker %s exited with code %s, restarting it", worker.number, worker.process.exitcode)
+                for future in worker.pending.values():
+                    if not future.done():
+                        future.set_exception(WorkerCrashed(f"check worker {worker.number} exited"))
+                self.workers[index] = self._spawn(worker.number)
+                self.restarts += 1
+
+    async def _call(self, method: str, *args):
+        self._start()
+        worker = min(self.workers, key=lambda w: len(w.pending))
+        return await self._send(worker, method, *args)
+
+    async def _send(self, worker: WorkerProcess, method: str, *args):
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        worker.pending[request_id] = future
+        worker.requests.put((request_id, method, args))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            worker.pending.pop(request_id, None)
+
+    async def get_product_info(self, store: str, url: str) -> dict:
+        """Get product information from the URL."""
+        try:
+            return await self._call('get_product_info', store, url)
+        except Throttled:
+            raise
+        except Exception as e:
+            logger.error("Error getting product info: %s", e)
+            return None
+
+    async def check_stock(self, product):
+        """Check a product in a worker; same results as ``BrowserHandler.check_stock``."""
+        try:
+            return await self._call('check_stock', product)
+        except (Throttled, CheckFailed):
+            raise
+        except asyncio.TimeoutError as e:
+            raise CheckFailed(TIMEOUT, f"no answer from the worker in {self.timeout:.0f}s") from e
+        except Exception as e:
+            raise CheckFailed(FAILED, f"{type(e).__name__}: {e}") from e
+
+    async def prewarm(self):
+        """Have every worker start Chrome in the background."""
+        self._start()
+        await asyncio.gather(
+            *(self._send(worker, 'prewarm') for worker in self.workers),
+            return_exceptions=True
+        )
+
+    async def aclose(self):
+        """Stop every worker without blocking the event loop."""
+        if self._closed:
+            return
+        self._closed = True
+        # Tasks can only be cancelled from the loop; the joins go to a thread
+        if self._watchdog:
+            self._watchdog.cancel()
+        await asyncio.get_running_loop().run_in_executor(None, self._stop_workers)
+
+    def close(self):
+        """Stop every worker, letting each one quit its browsers first.
+
+        Blocks for up to 10s per worker; on the event loop use ``aclose``.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._watchdog:
+            self._watchdog.cancel()
+        self._stop_workers()
+
+    def _stop_workers(self):
+        for worker in self.workers:
+            worker.stop()
+            for future in worker.pending.values():
+                if not future.done():
+                    self._loop.call_soon_threadsafe(future.cancel)
+        self.log_listener.stop()